@@ -1,9 +1,79 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 
+from .deletion import delete_group
 from .models import Group, Post
+from .search import fts_available, matching_ids
+from .tasks import delete_group_in_batches
 
 
-class PostAdmin(admin.ModelAdmin):
+class FullTextSearchMixin:
+    """Поиск в админке через FTS5 вместо LIKE '%...%'."""
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term or not fts_available():
+            return super().get_search_results(
+                request, queryset, search_term)
+        ids = matching_ids(self.model, search_term)
+        return queryset.filter(pk__in=ids), False
+
+
+class ChunkedDeletionMixin:
+    """Удаление через posts/deletion.py вместо сборщика Django.
+
+    Сборщик загружает и удаляет все посты автора или группы в одной
+    транзакции, надолго блокируя базу. Здесь посты обрабатываются
+    порциями: выбранные в списке объекты — фоновыми задачами, объект со
+    своей страницы — в процессе запроса.
+    """
+    actions = ['delete_in_batches']
+    # Функция удаления, фоновая задача с ней и поле поста, которое
+    # ссылается на объект.
+    delete_function = None
+    delete_task = None
+    posts_field = None
+
+    def get_actions(self, request):
+        actions = super().get_actions(request)
+        actions.pop('delete_selected', None)
+        return actions
+
+    def posts_of(self, objs):
+        return Post.objects.filter(**{f'{self.posts_field}__in': objs})
+
+    def lacks_post_permission(self, request, objs):
+        """Сборщик Django не дал бы удалить посты без права на это."""
+        return (not request.user.has_perm('posts.delete_post')
+                and self.posts_of(objs).exists())
+
+    def delete_in_batches(self, request, queryset):
+        objects = list(queryset)
+        if self.lacks_post_permission(request, objects):
+            self.message_user(
+                request, 'Нет права удалять посты выбранных объектов.',
+                messages.ERROR)
+            return
+        for obj in objects:
+            self.delete_task.delay(obj.pk)
+        self.message_user(
+            request, f'Запущено удаление: {len(objects)}. Посты '
+                     f'обрабатываются порциями, ход пишется в журнал.')
+    delete_in_batches.short_description = 'Удалить выбранные порциями'
+    delete_in_batches.allowed_permissions = ('delete',)
+
+    def delete_model(self, request, obj):
+        self.delete_function(obj)
+
+    def get_deleted_objects(self, objs, request):
+        # Страница подтверждения показывает число постов, а не список
+        # всех, который собрал бы сборщик.
+        counts = {Post._meta.verbose_name_plural: self.posts_of(objs).count()}
+        perms_needed = set()
+        if self.lacks_post_permission(request, objs):
+            perms_needed.add(Post._meta.verbose_name)
+        return [str(obj) for obj in objs], counts, perms_needed, []
+
+
+class PostAdmin(FullTextSearchMixin, admin.ModelAdmin):
     # перечисляем поля, которые должны отображаться в админке
     list_display = ("text", "pub_date", "author")
     # добавляем интерфейс для поиска по тексту постов
@@ -13,13 +83,17 @@ class PostAdmin(admin.ModelAdmin):
     empty_value_display = "-пусто-"
 
 
-class GroupAdmin(admin.ModelAdmin):
+class GroupAdmin(ChunkedDeletionMixin, FullTextSearchMixin,
+                 admin.ModelAdmin):
     # перечисляем поля, которые должны отображаться в админке
     list_display = ("title", "description", "slug")
-    # добавляем интерфейс для поиска по тексту постов
-    search_fields = ("text",)
+    # добавляем интерфейс для поиска по названию и описанию групп
+    search_fields = ("title", "description")
     empty_value_display = "-пусто-"
     prepopulated_fields = {"slug": ("title",)}
+    delete_function = staticmethod(delete_group)
+    delete_task = delete_group_in_batches
+    posts_field = "group"
 
 
 admin.site.register(Post, PostAdmin)
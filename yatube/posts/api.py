@@ -0,0 +1,90 @@
+from django.http import JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+
+from .cache import cache_feed
+from .conditional import conditional_feed, conditional_post
+from .lookups import get_author_or_404, get_group_or_404
+from .models import Post
+from .paginator import CursorPaginator
+from .serializers import (POST_LOOKUPS, author_to_dict, dumps, group_to_dict,
+                          post_to_dict, row_to_dict)
+from .views import COUNT_POSTS
+
+# Сколько строк выгрузки читать из базы за один раз.
+EXPORT_CHUNK_SIZE = 2000
+
+
+class APIPaginator(CursorPaginator):
+    """Страницы API листаются только курсорами и не требуют COUNT(*)."""
+
+    numbered = False
+
+
+def json_response(data, **kwargs):
+    return JsonResponse(
+        data, json_dumps_params={'ensure_ascii': False}, **kwargs)
+
+
+def feed_data(request, posts):
+    """Страница ленты с курсорами соседних страниц.
+
+    Курсоры передаются обратно в ?after= и ?before=, как в HTML-лентах.
+    """
+    page = APIPaginator(posts, COUNT_POSTS).get_page_from_request(
+        request.GET)
+    return {
+        'results': [post_to_dict(post) for post in page],
+        'next': page.next_cursor,
+        'previous': page.previous_cursor,
+    }
+
+
+@conditional_feed('index')
+@cache_feed('index')
+def index(request):
+    return json_response(feed_data(request, Post.feed.all()))
+
+
+@conditional_feed('group', 'slug')
+@cache_feed('group', 'slug')
+def group_posts(request, slug):
+    group = get_group_or_404(slug)
+    data = feed_data(request, Post.feed.filter(group=group))
+    return json_response({'group': group_to_dict(group), **data})
+
+
+@conditional_feed('profile', 'username')
+@cache_feed('profile', 'username')
+def profile(request, username):
+    author = get_author_or_404(username)
+    data = feed_data(request, Post.feed.filter(author=author))
+    return json_response({'author': author_to_dict(author), **data})
+
+
+@conditional_post
+def post_view(request, username, post_id):
+    post = get_object_or_404(
+        Post.feed, id=post_id, author=get_author_or_404(username))
+    return json_response(post_to_dict(post))
+
+
+def export(request):
+    """Все посты в формате NDJSON, по одному на строку, по возрастанию id.
+
+    Строки читаются из базы порциями и сразу отдаются клиенту, так что
+    память не зависит от числа постов. Прерванную выгрузку можно
+    продолжить с ?after_id=<последний полученный id>; ?group= и ?author=
+    ограничивают её группой или автором.
+    """
+    posts = Post.objects.order_by('id')
+    if request.GET.get('after_id', '').isdigit():
+        posts = posts.filter(id__gt=request.GET['after_id'])
+    if request.GET.get('group'):
+        posts = posts.filter(group__slug=request.GET['group'])
+    if request.GET.get('author'):
+        posts = posts.filter(author__username=request.GET['author'])
+    rows = posts.values_list(*POST_LOOKUPS).iterator(
+        chunk_size=EXPORT_CHUNK_SIZE)
+    return StreamingHttpResponse(
+        (dumps(row_to_dict(row)) + '\n' for row in rows),
+        content_type='application/x-ndjson; charset=utf-8')
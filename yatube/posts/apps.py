@@ -3,3 +3,10 @@ from django.apps import AppConfig
 
 class PostsConfig(AppConfig):
     name = 'posts'
+
+    def ready(self):
+        from django.core import checks
+        from yatube.storage import check_vendor_assets
+
+        from . import signals  # noqa: F401
+        checks.register(check_vendor_assets, 'staticfiles')
@@ -0,0 +1,83 @@
+import datetime as dt
+import random
+from collections import Counter
+
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from users.models import Profile
+
+from .formatting import render_text
+from .fts import post_triggers_suspended
+from .models import Group, Post
+
+User = get_user_model()
+
+
+def bulk_create_with_dates(posts):
+    """Вставляет посты с заданными pub_date и updated_at.
+
+    bulk_create ставит полям с auto_now текущее время. Вставка с
+    raw=True не вызывает pre_save полей, поэтому даты уходят в тот же
+    INSERT. Как и bulk_create, сигналов не отправляет; id постам не
+    присваиваются.
+    """
+    fields = [field for field in Post._meta.concrete_fields
+              if field is not Post._meta.pk]
+    batch_size = max(connection.ops.bulk_batch_size(fields, posts), 1)
+    for start in range(0, len(posts), batch_size):
+        Post.objects._insert(posts[start:start + batch_size], fields,
+                             raw=True)
+
+
+def random_post(rng, number, author_id, group_ids, start):
+    group_id = rng.choice(group_ids) if rng.random() < 0.8 else None
+    pub_date = start + dt.timedelta(minutes=number)
+    text = f'Тестовый текст {number} ' + 'слово ' * rng.randint(5, 60)
+    return Post(text=text, text_html=render_text(text),
+                pub_date=pub_date, updated_at=pub_date,
+                author_id=author_id, group_id=group_id)
+
+
+def seed(posts, authors, groups, batch_size=5000, random_seed=0):
+    """Наполняет базу постами для нагрузочных замеров.
+
+    Авторы получают посты неравномерно, как на живом сайте: у первых
+    авторов их больше всего. Четыре поста из пяти попадают в группы.
+    Счётчики профилей и групп заполняются сразу, без сигналов.
+    """
+    rng = random.Random(random_seed)
+    User.objects.bulk_create(
+        User(username=f'bench{i}', first_name='Имя', last_name=f'Автор{i}',
+             password='!') for i in range(authors))
+    Group.objects.bulk_create(
+        Group(title=f'Группа {i}', slug=f'bench-{i}',
+              description=f'Описание группы {i}') for i in range(groups))
+    # bulk_create на SQLite не возвращает id, поэтому они читаются заново.
+    author_ids = list(User.objects.filter(
+        username__startswith='bench').order_by('pk').values_list(
+        'pk', flat=True))
+    group_ids = list(Group.objects.filter(
+        slug__startswith='bench-').order_by('pk').values_list(
+        'pk', flat=True))
+    weights = [1 / (rank + 1) for rank in range(len(author_ids))]
+    start = dt.datetime.now() - dt.timedelta(minutes=posts)
+    author_counts = Counter()
+    group_counts = Counter()
+    with transaction.atomic():
+        with post_triggers_suspended(connection):
+            for offset in range(0, posts, batch_size):
+                size = min(batch_size, posts - offset)
+                batch = [
+                    random_post(rng, number, author_id, group_ids, start)
+                    for number, author_id in enumerate(
+                        rng.choices(author_ids, weights, k=size), offset)
+                ]
+                bulk_create_with_dates(batch)
+                author_counts.update(post.author_id for post in batch)
+                group_counts.update(post.group_id for post in batch)
+    Profile.objects.bulk_create(
+        Profile(user_id=author_id, posts_count=author_counts[author_id])
+        for author_id in author_ids)
+    for group_id in group_ids:
+        Group.objects.filter(pk=group_id).update(
+            posts_count=group_counts[group_id])
@@ -0,0 +1,90 @@
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from yatube.routers import replica_reads_active
+
+from .paginator import PAGE_PARAMS
+
+
+def version_key(feed, key=''):
+    return f'feed-version:{feed}:{key}'
+
+
+def get_feed_version(feed, key=''):
+    version = cache.get(version_key(feed, key))
+    if version is None:
+        version = bump_feed_version(feed, key)
+    return version
+
+
+def bump_feed_version(feed, key=''):
+    """Делает все закешированные страницы ленты недоступными.
+
+    Версия берётся из текущего времени, а не увеличивается на единицу:
+    после вытеснения ключа или гонки двух процессов с файловым кешем
+    старая версия не может вернуться.
+    """
+    version = time.time_ns()
+    cache.set(version_key(feed, key), version, None)
+    return version
+
+
+def replica_may_lag(version):
+    """Реплика могла ещё не получить правку, сменившую версию ленты.
+
+    Версия — время правки, а дольше REPLICA_STICKY_SECONDS реплика не
+    отстаёт. Прочитанное из неё до этого срока нельзя класть в общий
+    кеш под новой версией: устаревшая страница жила бы там до
+    следующей правки.
+    """
+    return (replica_reads_active()
+            and time.time_ns() - version
+            < settings.REPLICA_STICKY_SECONDS * 10 ** 9)
+
+
+def page_cache_key(request, feed, key, version):
+    params = '&'.join(
+        f'{name}={request.GET.get(name, "")}' for name in PAGE_PARAMS)
+    # Одна лента отдаётся и страницей, и через API — по разным путям.
+    raw = (f'{request.path}:{feed}:{key}:{version}:'
+           f'{request.user.pk or 0}:{params}')
+    return 'feed-page:' + hashlib.md5(raw.encode()).hexdigest()
+
+
+def cache_feed(feed, key_kwarg=None):
+    """Кеширует отрисованные страницы ленты до смены её версии.
+
+    key_kwarg — имя аргумента view, который определяет ленту
+    (slug группы, username автора).
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            key = kwargs.get(key_kwarg, '') if key_kwarg else ''
+            version = get_feed_version(feed, key)
+            cache_key = page_cache_key(request, feed, key, version)
+            cached = cache.get(cache_key)
+            if cached is not None:
+                content, content_type = cached
+                return HttpResponse(content, content_type=content_type)
+            response = view(request, *args, **kwargs)
+            if (response.status_code == 200 and not response.streaming
+                    and not replica_may_lag(version)):
+                cache.set(cache_key,
+                          (response.content, response['Content-Type']),
+                          settings.FEED_CACHE_TIMEOUT)
+            return response
+        return wrapper
+    return decorator
+
+
+def bump_post_feeds(post):
+    """Сбрасывает ленты, в которых показывается пост."""
+    bump_feed_version('index')
+    bump_feed_version('profile', post.author.username)
+    if post.group is not None:
+        bump_feed_version('group', post.group.slug)
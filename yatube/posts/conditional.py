@@ -0,0 +1,97 @@
+import datetime as dt
+import hashlib
+
+from django.views.decorators.http import condition
+
+from .cache import get_feed_version, replica_may_lag
+from .models import Post
+from .paginator import PAGE_PARAMS
+
+# Как отобрать посты ленты по аргументу view.
+FEED_LOOKUPS = {
+    'index': None,
+    'group': 'group__slug',
+    'profile': 'author__username',
+}
+
+
+def version_time(version):
+    """Момент последнего изменения ленты, записанный в её версию."""
+    return dt.datetime.fromtimestamp(version / 10 ** 9)
+
+
+def make_etag(request, *parts):
+    # Страницы отличаются для разных пользователей шапкой сайта.
+    raw = ':'.join(str(part) for part in (*parts, request.user.pk or 0))
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+def newest_update(posts):
+    """Время последней правки среди постов — один запрос по индексу."""
+    return posts.order_by('-updated_at').values_list(
+        'updated_at', flat=True).first()
+
+
+def latest(*moments):
+    return max((moment for moment in moments if moment is not None),
+               default=None)
+
+
+def conditional_feed(feed, key_kwarg=None):
+    """ETag и Last-Modified для ленты без отрисовки шаблона.
+
+    ETag строится из версии ленты, поэтому меняется при любой правке или
+    удалении поста. Last-Modified — это время последней правки в базе или
+    смены версии, смотря что позже. Пока реплика может отставать от
+    версии, обоих заголовков нет: иначе браузер закрепил бы старую
+    страницу ответами 304.
+    """
+    lookup = FEED_LOOKUPS[feed]
+
+    def feed_key(kwargs):
+        return kwargs.get(key_kwarg, '') if key_kwarg else ''
+
+    def etag(request, **kwargs):
+        key = feed_key(kwargs)
+        version = get_feed_version(feed, key)
+        if replica_may_lag(version):
+            return None
+        params = [request.GET.get(name, '') for name in PAGE_PARAMS]
+        return make_etag(request, feed, key, version, *params)
+
+    def last_modified(request, **kwargs):
+        key = feed_key(kwargs)
+        version = get_feed_version(feed, key)
+        if replica_may_lag(version):
+            return None
+        posts = Post.objects.all()
+        if lookup is not None:
+            posts = posts.filter(**{lookup: key})
+        return latest(newest_update(posts), version_time(version))
+
+    return condition(etag_func=etag, last_modified_func=last_modified)
+
+
+def post_etag(request, username, post_id):
+    # Версия ленты автора меняется при правке поста и вместе со
+    # счётчиком записей в карточке автора.
+    version = get_feed_version('profile', username)
+    if replica_may_lag(version):
+        return None
+    return make_etag(request, 'post', post_id, version)
+
+
+def post_last_modified(request, username, post_id):
+    version = get_feed_version('profile', username)
+    if replica_may_lag(version):
+        return None
+    updated_at = Post.objects.filter(
+        id=post_id, author__username=username).order_by().values_list(
+        'updated_at', flat=True).first()
+    if updated_at is None:
+        return None
+    return latest(updated_at, version_time(version))
+
+
+conditional_post = condition(etag_func=post_etag,
+                             last_modified_func=post_last_modified)
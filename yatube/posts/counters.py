@@ -0,0 +1,87 @@
+from django.db.models import Count, F
+from users.models import Profile
+
+from .models import Group
+
+
+def change_posts_count(queryset, delta):
+    """Атомарно меняет posts_count через UPDATE ... SET x = x + delta."""
+    if delta < 0:
+        queryset = queryset.filter(posts_count__gte=-delta)
+    return queryset.update(posts_count=F('posts_count') + delta)
+
+
+def post_added(post):
+    updated = change_posts_count(
+        Profile.objects.filter(user_id=post.author_id), 1)
+    if not updated:
+        Profile.objects.get_or_create(user_id=post.author_id)
+        recount_profiles(Profile.objects.filter(user_id=post.author_id))
+    if post.group_id is not None:
+        change_posts_count(Group.objects.filter(pk=post.group_id), 1)
+
+
+def post_removed(post):
+    change_posts_count(Profile.objects.filter(user_id=post.author_id), -1)
+    if post.group_id is not None:
+        change_posts_count(Group.objects.filter(pk=post.group_id), -1)
+
+
+def posts_imported(author_counts, group_counts):
+    """Счётчики для постов, вставленных bulk_create в обход сигналов.
+
+    Принимает словари {id автора или группы: число новых постов}.
+    """
+    for author_id, count in author_counts.items():
+        profiles = Profile.objects.filter(user_id=author_id)
+        if not change_posts_count(profiles, count):
+            Profile.objects.get_or_create(user_id=author_id)
+            recount_profiles(profiles)
+    for group_id, count in group_counts.items():
+        change_posts_count(Group.objects.filter(pk=group_id), count)
+
+
+def posts_deleted(author_counts, group_counts):
+    """Счётчики для постов, удалённых в обход сигналов.
+
+    Принимает словари {id автора или группы: число удалённых постов}.
+    """
+    for author_id, count in author_counts.items():
+        change_posts_count(Profile.objects.filter(user_id=author_id), -count)
+    for group_id, count in group_counts.items():
+        change_posts_count(Group.objects.filter(pk=group_id), -count)
+
+
+def post_moved(old_group_id, new_group_id):
+    """Переносит пост из одной группы в другую в счётчиках групп."""
+    if old_group_id is not None:
+        change_posts_count(Group.objects.filter(pk=old_group_id), -1)
+    if new_group_id is not None:
+        change_posts_count(Group.objects.filter(pk=new_group_id), 1)
+
+
+def fix_drifted(queryset, relation):
+    """Записывает точное число постов туда, где счётчик разошёлся.
+
+    Возвращает число исправленных строк.
+    """
+    drifted = queryset.annotate(actual=Count(relation)).exclude(
+        posts_count=F('actual'))
+    fixed = 0
+    for obj in drifted.iterator():
+        queryset.model.objects.filter(pk=obj.pk).update(
+            posts_count=obj.actual)
+        fixed += 1
+    return fixed
+
+
+def recount_profiles(queryset=None):
+    if queryset is None:
+        queryset = Profile.objects.all()
+    return fix_drifted(queryset, 'user__posts')
+
+
+def recount_groups(queryset=None):
+    if queryset is None:
+        queryset = Group.objects.all()
+    return fix_drifted(queryset, 'posts')
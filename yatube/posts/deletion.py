@@ -0,0 +1,145 @@
+import logging
+import threading
+from collections import Counter
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from users.models import Profile
+
+from .cache import bump_feed_version
+from .counters import posts_deleted
+from .models import Follow, Group, Post, TimelineEntry
+from .timeline import refill_no_longer_popular
+
+logger = logging.getLogger(__name__)
+User = get_user_model()
+
+_state = threading.local()
+
+
+@contextmanager
+def batch_deletion():
+    """Сигналы удаления постов в этом потоке не трогают счётчики и ленты:
+    delete_posts обновляет их сразу за всю порцию."""
+    _state.active = True
+    try:
+        yield
+    finally:
+        _state.active = False
+
+
+def in_batch_deletion():
+    return getattr(_state, 'active', False)
+
+
+def batches(queryset, batch_size):
+    """id строк порциями по возрастанию.
+
+    Каждая порция выбирается заново: предыдущая к этому времени уже
+    удалена или откреплена и в выборку не попадает.
+    """
+    while True:
+        ids = list(queryset.order_by('pk').values_list(
+            'pk', flat=True)[:batch_size])
+        if not ids:
+            return
+        yield ids
+
+
+def no_progress(done, total):
+    pass
+
+
+def delete_group(group, batch_size=None, progress=no_progress):
+    """Удаляет группу, открепляя её посты порциями.
+
+    Каждая порция — отдельная короткая транзакция, так что ленты
+    читаются и во время удаления большой группы. Возвращает число
+    откреплённых постов.
+    """
+    batch_size = batch_size or settings.DELETION_BATCH_SIZE
+    posts = Post.objects.filter(group=group)
+    total = posts.count()
+    done = 0
+    for ids in batches(posts, batch_size):
+        batch = Post.objects.filter(pk__in=ids)
+        with transaction.atomic():
+            usernames = set(batch.values_list('author__username', flat=True))
+            # Группа — часть поста в API, поэтому пост считается
+            # изменённым: это сбрасывает его ETag и кеш карточки.
+            batch.update(group=None, updated_at=timezone.now())
+            posts_deleted({}, {group.pk: len(ids)})
+        bump_feed_version('index')
+        bump_feed_version('group', group.slug)
+        for username in usernames:
+            bump_feed_version('profile', username)
+        done += len(ids)
+        progress(done, total)
+    group.delete()
+    return done
+
+
+def delete_posts(ids):
+    """Удаляет посты вместе с записями лент подписчиков.
+
+    Сигналы на каждый пост заглушены: счётчики и версии лент
+    обновляются сразу за всю порцию.
+    """
+    batch = Post.objects.filter(pk__in=ids)
+    authors = Counter()
+    groups = Counter()
+    for author_id, group_id in batch.values_list('author_id', 'group_id'):
+        authors[author_id] += 1
+        if group_id is not None:
+            groups[group_id] += 1
+    slugs = list(Group.objects.filter(pk__in=groups).values_list(
+        'slug', flat=True))
+    TimelineEntry.objects.filter(post_id__in=ids).delete()
+    with batch_deletion():
+        batch.delete()
+    posts_deleted(authors, groups)
+    return slugs
+
+
+def delete_user(user, batch_size=None, progress=no_progress):
+    """Удаляет пользователя, его посты и подписки порциями.
+
+    Возвращает число удалённых постов.
+    """
+    batch_size = batch_size or settings.DELETION_BATCH_SIZE
+    posts = Post.objects.filter(author=user)
+    total = posts.count()
+    done = 0
+    for ids in batches(posts, batch_size):
+        with transaction.atomic():
+            slugs = delete_posts(ids)
+        bump_feed_version('index')
+        bump_feed_version('profile', user.username)
+        for slug in slugs:
+            bump_feed_version('group', slug)
+        done += len(ids)
+        progress(done, total)
+    for ids in batches(TimelineEntry.objects.filter(user=user), batch_size):
+        TimelineEntry.objects.filter(pk__in=ids).delete()
+    with transaction.atomic():
+        unfollow_everyone(user)
+        user.delete()
+    return done
+
+
+def unfollow_everyone(user):
+    """Убирает подписки пользователя и на пользователя из счётчиков."""
+    followed = Follow.objects.filter(user=user).values('author')
+    followers = Follow.objects.filter(author=user).values('user')
+    Profile.objects.filter(user__in=followed, followers_count__gt=0).update(
+        followers_count=F('followers_count') - 1)
+    refill_no_longer_popular(followed)
+    Profile.objects.filter(user__in=followers, following_count__gt=0).update(
+        following_count=F('following_count') - 1)
+    related = User.objects.filter(Q(pk__in=followed) | Q(pk__in=followers))
+    for username in related.values_list('username', flat=True):
+        bump_feed_version('profile', username)
@@ -0,0 +1,17 @@
+from django.utils.html import escape
+from django.utils.text import normalize_newlines
+
+# Меняется вместе с правилами отрисовки: старые карточки в кеше
+# перестают совпадать по ключу, а render_posts_html --all перерисует
+# сохранённый HTML.
+FORMAT_VERSION = 1
+
+
+def render_text(text):
+    """HTML текста поста: экранированный, с <br> на месте переносов.
+
+    Результат совпадает с фильтром linebreaksbr и безопасен для вывода
+    без экранирования. Сюда же ложится более богатая разметка — ссылки,
+    упоминания — чтобы платить за неё при записи, а не при чтении.
+    """
+    return escape(normalize_newlines(text)).replace('\n', '<br>')
@@ -6,10 +6,11 @@ from .models import Post
 class PostForm(forms.ModelForm):
     class Meta:
         model = Post
-        fields = ("text", "group")
+        fields = ("text", "group", "image")
         help_texts = {
             "text": 'Введите Ваш комментарий',
             "group": 'Выберите группу',
+            "image": 'Прикрепите картинку',
         }
         error_messages = {
             'text': {
@@ -0,0 +1,46 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import get_template
+from django.utils.safestring import mark_safe
+
+from .formatting import FORMAT_VERSION
+
+
+def fragment_key(template_name, post):
+    """Ключ карточки поста.
+
+    Правка поста меняет updated_at, а с ним и ключ, поэтому старая
+    карточка просто перестаёт читаться. Имя автора тоже входит в ключ:
+    оно выводится в карточке, но хранится не в посте.
+    """
+    author = post.author
+    raw = (f'{FORMAT_VERSION}:{template_name}:{post.pk}:'
+           f'{post.updated_at.isoformat()}:'
+           f'{author.username}:{author.get_full_name()}')
+    return 'post-fragment:' + hashlib.md5(raw.encode()).hexdigest()
+
+
+def render_fragments(posts, template_name):
+    """Пары (пост, отрисованная карточка) для страницы ленты.
+
+    Готовые карточки читаются из кеша одним get_many, недостающие
+    отрисовываются и записываются одним set_many.
+    """
+    posts = list(posts)
+    keys = [fragment_key(template_name, post) for post in posts]
+    cached = cache.get_many(keys)
+    missing = {}
+    template = None
+    fragments = []
+    for post, key in zip(posts, keys):
+        fragment = cached.get(key)
+        if fragment is None:
+            if template is None:
+                template = get_template(template_name)
+            fragment = missing[key] = template.render({'post': post})
+        fragments.append(mark_safe(fragment))
+    if missing:
+        cache.set_many(missing, settings.POST_FRAGMENT_CACHE_TIMEOUT)
+    return list(zip(posts, fragments))
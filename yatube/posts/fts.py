@@ -0,0 +1,119 @@
+"""SQL полнотекстового индекса FTS5 для постов и групп.
+
+Внешние FTS5-таблицы хранят только индекс; тексты остаются в posts_post
+и posts_group, а триггеры поддерживают индекс в актуальном состоянии при
+любых изменениях, включая bulk_create и update().
+
+SQLite удаляет триггеры вместе с таблицей, а Django на SQLite меняет
+схему пересозданием таблицы. Поэтому миграции, меняющие схему posts_post
+или posts_group, должны заново вызвать install_triggers.
+"""
+
+from contextlib import contextmanager
+
+POST_TRIGGERS = [
+    """CREATE TRIGGER IF NOT EXISTS posts_post_fts_ai
+    AFTER INSERT ON posts_post BEGIN
+        INSERT INTO posts_post_fts(rowid, text) VALUES (new.id, new.text);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS posts_post_fts_ad
+    AFTER DELETE ON posts_post BEGIN
+        INSERT INTO posts_post_fts(posts_post_fts, rowid, text)
+        VALUES ('delete', old.id, old.text);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS posts_post_fts_au
+    AFTER UPDATE OF text ON posts_post BEGIN
+        INSERT INTO posts_post_fts(posts_post_fts, rowid, text)
+        VALUES ('delete', old.id, old.text);
+        INSERT INTO posts_post_fts(rowid, text) VALUES (new.id, new.text);
+    END""",
+]
+
+GROUP_TRIGGERS = [
+    """CREATE TRIGGER IF NOT EXISTS posts_group_fts_ai
+    AFTER INSERT ON posts_group BEGIN
+        INSERT INTO posts_group_fts(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS posts_group_fts_ad
+    AFTER DELETE ON posts_group BEGIN
+        INSERT INTO posts_group_fts(posts_group_fts, rowid, title,
+                                    description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS posts_group_fts_au
+    AFTER UPDATE OF title, description ON posts_group BEGIN
+        INSERT INTO posts_group_fts(posts_group_fts, rowid, title,
+                                    description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO posts_group_fts(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END""",
+]
+
+CREATE_TABLES = [
+    """CREATE VIRTUAL TABLE posts_post_fts USING fts5(
+        text, content='posts_post', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2')""",
+    """CREATE VIRTUAL TABLE posts_group_fts USING fts5(
+        title, description, content='posts_group', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2')""",
+]
+
+REBUILD_POSTS = "INSERT INTO posts_post_fts(posts_post_fts) VALUES ('rebuild')"
+
+REBUILD = [
+    REBUILD_POSTS,
+    "INSERT INTO posts_group_fts(posts_group_fts) VALUES ('rebuild')",
+]
+
+DROP_POST_TRIGGERS = [
+    'DROP TRIGGER IF EXISTS posts_post_fts_ai',
+    'DROP TRIGGER IF EXISTS posts_post_fts_ad',
+    'DROP TRIGGER IF EXISTS posts_post_fts_au',
+]
+
+DROP = DROP_POST_TRIGGERS + [
+    'DROP TABLE IF EXISTS posts_post_fts',
+    'DROP TRIGGER IF EXISTS posts_group_fts_ai',
+    'DROP TRIGGER IF EXISTS posts_group_fts_ad',
+    'DROP TRIGGER IF EXISTS posts_group_fts_au',
+    'DROP TABLE IF EXISTS posts_group_fts',
+]
+
+
+@contextmanager
+def post_triggers_suspended(connection):
+    """Массовая вставка постов без построчного обновления индекса.
+
+    После вставки индекс перестраивается целиком, что для большого
+    числа строк заметно быстрее.
+    """
+    if connection.vendor != 'sqlite':
+        yield
+        return
+    with connection.cursor() as cursor:
+        for statement in DROP_POST_TRIGGERS:
+            cursor.execute(statement)
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            for statement in POST_TRIGGERS + [REBUILD_POSTS]:
+                cursor.execute(statement)
+
+
+def run_on_sqlite(statements):
+    """Операция для RunPython, которая выполняется только на SQLite."""
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+create_fts = run_on_sqlite(
+    CREATE_TABLES + POST_TRIGGERS + GROUP_TRIGGERS + REBUILD)
+drop_fts = run_on_sqlite(DROP)
+install_triggers = run_on_sqlite(POST_TRIGGERS + GROUP_TRIGGERS)
@@ -0,0 +1,117 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import Http404
+
+from .cache import get_feed_version, replica_may_lag
+from .models import Group
+
+User = get_user_model()
+
+# Поля автора для шапки профиля и карточки пользователя: без пароля и
+# почты, которые незачем держать в кеше.
+AUTHOR_FIELDS = (
+    'username', 'first_name', 'last_name',
+    'profile__posts_count', 'profile__followers_count',
+    'profile__following_count',
+)
+
+
+class LookupCache:
+    """Процессный LRU-кеш небольшого горячего набора строк.
+
+    Запись живёт не дольше LOOKUP_CACHE_TIMEOUT секунд и хранит версию
+    ленты, при которой она прочитана: правка счётчиков и самой строки
+    меняет версию, и запись перечитывается. С LOOKUP_CACHE_SHARED
+    промахи сначала ищутся в общем кеше, так что процессы сервера
+    разделяют прочитанное. Возвращаемые объекты общие для всех
+    запросов, менять их нельзя. Строки, прочитанные из отстающей
+    реплики, не кешируются, см. replica_may_lag.
+    """
+
+    def __init__(self, name, feed, load):
+        self.name = name
+        self.feed = feed
+        self.load = load
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+
+    def shared_key(self, key):
+        return f'lookup:{self.name}:{key}'
+
+    def get(self, key):
+        """Объект по ключу или None, если его нет в базе."""
+        version = get_feed_version(self.feed, key)
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                expires, entry_version, value = entry
+                if expires > now and entry_version == version:
+                    self.entries.move_to_end(key)
+                    return value
+                del self.entries[key]
+        value = None
+        if settings.LOOKUP_CACHE_SHARED:
+            shared = cache.get(self.shared_key(key))
+            if shared is not None and shared[0] == version:
+                value = shared[1]
+        if value is None:
+            value = self.load(key)
+            # Отсутствующие строки не кешируются: их создание не должно
+            # ждать истечения срока.
+            if value is None:
+                return None
+            if replica_may_lag(version):
+                return value
+            if settings.LOOKUP_CACHE_SHARED:
+                cache.set(self.shared_key(key), (version, value),
+                          settings.LOOKUP_CACHE_TIMEOUT)
+        with self.lock:
+            self.entries[key] = (now + settings.LOOKUP_CACHE_TIMEOUT,
+                                 version, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > settings.LOOKUP_CACHE_SIZE:
+                self.entries.popitem(last=False)
+        return value
+
+    def forget(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+        if settings.LOOKUP_CACHE_SHARED:
+            cache.delete(self.shared_key(key))
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+def load_group(slug):
+    return Group.objects.filter(slug=slug).first()
+
+
+def load_author(username):
+    return User.objects.select_related('profile').only(
+        *AUTHOR_FIELDS).filter(username=username).first()
+
+
+groups = LookupCache('group', 'group', load_group)
+authors = LookupCache('author', 'profile', load_author)
+
+
+def get_group_or_404(slug):
+    group = groups.get(slug)
+    if group is None:
+        raise Http404('Группа не найдена')
+    return group
+
+
+def get_author_or_404(username):
+    author = authors.get(username)
+    if author is None:
+        raise Http404('Пользователь не найден')
+    return author
@@ -0,0 +1,171 @@
+import json
+import platform
+import time
+
+import django
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.bulk import seed
+from posts.models import Group, Post
+from posts.paginator import encode_cursor
+from posts.views import COUNT_POSTS
+
+User = get_user_model()
+
+# Доля ленты, на которой лежит «глубокая» страница.
+DEEP_PAGE = 0.9
+
+
+def percentile(values, share):
+    """Перцентиль по ближайшему рангу."""
+    ordered = sorted(values)
+    rank = max(int(round(share * len(ordered) + 0.5)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+def summary(latencies, queries):
+    return {
+        'latency_ms': {
+            'p50': round(percentile(latencies, 0.5), 3),
+            'p90': round(percentile(latencies, 0.9), 3),
+            'p99': round(percentile(latencies, 0.99), 3),
+            'mean': round(sum(latencies) / len(latencies), 3),
+            'min': round(min(latencies), 3),
+            'max': round(max(latencies), 3),
+        },
+        'queries': {'min': min(queries), 'max': max(queries)},
+    }
+
+
+class Command(BaseCommand):
+    help = ('Наполняет отдельную тестовую базу постами и замеряет задержку '
+            'и число запросов основных страниц на первых и дальних '
+            'страницах лент. Результат — JSON.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=10 ** 4)
+        parser.add_argument('--authors', type=int, default=1000)
+        parser.add_argument('--groups', type=int, default=50)
+        parser.add_argument('--iterations', type=int, default=30)
+        parser.add_argument('--warmup', type=int, default=3)
+        parser.add_argument(
+            '--warm-cache', action='store_true',
+            help='Не очищать кеш перед запросами: замерять страницы, '
+                 'отдаваемые из кеша лент.')
+        parser.add_argument(
+            '--output', default='-',
+            help='Файл для JSON с результатами, «-» — стандартный вывод.')
+        parser.add_argument(
+            '--in-place', action='store_true',
+            help='Наполнить текущую базу, а не временную тестовую.')
+
+    def handle(self, *args, **options):
+        old_name = None
+        if not options['in_place']:
+            old_name = connection.creation.create_test_db(
+                verbosity=0, autoclobber=True)
+        try:
+            report = self.run(options)
+        finally:
+            if old_name is not None:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+        content = json.dumps(report, ensure_ascii=False, indent=2)
+        if options['output'] == '-':
+            self.stdout.write(content)
+        else:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                file.write(content)
+
+    def run(self, options):
+        started = time.monotonic()
+        seed(options['posts'], options['authors'], options['groups'])
+        seeded = time.monotonic() - started
+        self.stderr.write(
+            f'Создано постов: {options["posts"]} за {seeded:.1f} с.')
+        results = []
+        for name, method, url, data, user in self.scenarios():
+            latencies, queries = self.measure(
+                method, url, data, user, options)
+            results.append({'name': name, 'method': method, 'url': url,
+                            **summary(latencies, queries)})
+            self.stderr.write(
+                f'{name}: p50 {results[-1]["latency_ms"]["p50"]} мс, '
+                f'{queries[-1]} запросов.')
+        return {
+            'meta': {
+                'posts': options['posts'],
+                'authors': options['authors'],
+                'groups': options['groups'],
+                'iterations': options['iterations'],
+                'warm_cache': options['warm_cache'],
+                'seed_seconds': round(seeded, 3),
+                'database': connection.vendor,
+                'django': django.get_version(),
+                'python': platform.python_version(),
+            },
+            'results': results,
+        }
+
+    def feed_pages(self, name, url, posts):
+        """Первая страница, дальняя по номеру и дальняя по курсору."""
+        total = posts.count()
+        deep = int(total * DEEP_PAGE)
+        page = deep // COUNT_POSTS + 1
+        yield f'{name}:first', url
+        yield f'{name}:page={page}', f'{url}?page={page}'
+        post = posts.order_by('-pub_date', '-id')[deep]
+        yield f'{name}:after', f'{url}?after={encode_cursor(post)}'
+
+    def scenarios(self):
+        group = Group.objects.order_by('-posts_count').first()
+        author = User.objects.annotate(total=Count('posts')).order_by(
+            '-total').first()
+        post = Post.objects.filter(author=author).latest('pub_date')
+        feeds = [
+            ('index', reverse('posts:index'), Post.objects.all()),
+            ('group_posts',
+             reverse('posts:group_posts', args=[group.slug]),
+             Post.objects.filter(group=group)),
+            ('profile', reverse('posts:profile', args=[author.username]),
+             Post.objects.filter(author=author)),
+        ]
+        for name, url, posts in feeds:
+            for page_name, page_url in self.feed_pages(name, url, posts):
+                yield page_name, 'GET', page_url, None, None
+        yield ('post_view', 'GET',
+               reverse('posts:post_view', args=[author.username, post.pk]),
+               None, None)
+        yield ('new_post', 'POST', reverse('posts:new_post'),
+               {'text': 'Новый пост', 'group': group.pk}, author)
+        yield ('post_edit', 'POST',
+               reverse('posts:post_edit', args=[author.username, post.pk]),
+               {'text': 'Исправленный пост', 'group': group.pk}, author)
+
+    def measure(self, method, url, data, user, options):
+        client = Client()
+        if user is not None:
+            client.force_login(user)
+        latencies, queries = [], []
+        for iteration in range(options['warmup'] + options['iterations']):
+            if not options['warm_cache']:
+                cache.clear()
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                if method == 'POST':
+                    response = client.post(url, data)
+                else:
+                    response = client.get(url)
+                elapsed = (time.perf_counter() - started) * 1000
+            if response.status_code >= 400:
+                raise CommandError(f'{url}: ответ {response.status_code}')
+            if iteration >= options['warmup']:
+                latencies.append(elapsed)
+                queries.append(len(captured))
+        return latencies, queries
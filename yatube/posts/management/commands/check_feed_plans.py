@@ -0,0 +1,82 @@
+import datetime as dt
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from posts.management.commands.export_posts import Command as ExportPosts
+from posts.models import Post
+from posts.paginator import CursorPaginator
+from posts.views import COUNT_POSTS
+
+POSTS_SCAN = re.compile(rf'^SCAN (TABLE )?{Post._meta.db_table}\b')
+POSTS_SEARCH = f'SEARCH {Post._meta.db_table} '
+TEMP_SORT = 'USE TEMP B-TREE'
+
+
+def feed_queries():
+    """Запросы страниц лент в том виде, в каком их выполняют views, и
+    запрос выгрузки export_posts от водяного знака.
+
+    Вместе с запросом отдаётся диапазон pub_date, который должен искаться
+    по индексу. Первой странице диапазон не нужен: она читает индекс с
+    начала и останавливается на LIMIT.
+    """
+    cursor = (dt.datetime.now(), 1)
+    feeds = {
+        'index': Post.feed.all(),
+        'group_posts': Post.feed.filter(group_id=1),
+        'profile': Post.feed.filter(author_id=1),
+    }
+    for name, posts in feeds.items():
+        paginator = CursorPaginator(posts, COUNT_POSTS)
+        yield f'{name}:first', paginator.object_list[:COUNT_POSTS], None
+        yield (f'{name}:after', paginator.after(cursor)[:COUNT_POSTS + 1],
+               'pub_date<?')
+        yield (f'{name}:before', paginator.before(cursor)[:COUNT_POSTS + 1],
+               'pub_date>?')
+    export = ExportPosts().watermarked(
+        Post.objects.order_by('pub_date', 'id'), cursor[0].isoformat(), 1)
+    yield 'export:since', export, 'pub_date>?'
+
+
+def plan_problems(plan, bound):
+    """Шаги плана, которые не годятся для ленты."""
+    if bound is None:
+        # Обход индекса первой страницей допустим, сортировка — нет.
+        bad = [step for step in plan
+               if POSTS_SCAN.search(step) and 'USING' not in step]
+    else:
+        bad = [step for step in plan if POSTS_SCAN.search(step)]
+        if not any(step.startswith(POSTS_SEARCH) and f'{bound})' in step
+                   for step in plan):
+            bad.append(f'нет поиска диапазона ({bound})')
+    return bad + [step for step in plan if TEMP_SORT in step]
+
+
+class Command(BaseCommand):
+    help = ('Проверяет EXPLAIN QUERY PLAN запросов лент: '
+            'ни одна не должна сканировать таблицу постов или сортировать '
+            'во временном B-дереве, а страницы по курсору должны искать '
+            'диапазон pub_date по индексу.')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('Проверка планов поддерживает только SQLite.')
+        problems = []
+        for name, queryset, bound in feed_queries():
+            sql, params = queryset.query.sql_with_params()
+            with connection.cursor() as cursor:
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+                plan = [row[-1] for row in cursor.fetchall()]
+            bad = plan_problems(plan, bound)
+            if bad:
+                problems.append(f'{name}: {"; ".join(bad)}')
+            if options['verbosity'] > 1:
+                self.stdout.write(f'{name}: {"; ".join(plan)}')
+        if problems:
+            raise CommandError(
+                'Запросы лент без подходящего индекса:\n'
+                + '\n'.join(problems))
+        self.stdout.write(self.style.SUCCESS('Все запросы лент используют '
+                                             'индексы.'))
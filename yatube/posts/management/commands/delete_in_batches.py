@@ -0,0 +1,39 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.deletion import delete_group, delete_user
+from posts.models import Group
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = ('Удаляет пользователя со всеми постами или группу, открепляя '
+            'её посты, порциями в коротких транзакциях: ленты остаются '
+            'доступны всё время удаления.')
+
+    def add_arguments(self, parser):
+        target = parser.add_mutually_exclusive_group(required=True)
+        target.add_argument('--user', metavar='USERNAME')
+        target.add_argument('--group', metavar='SLUG')
+        parser.add_argument(
+            '--batch-size', type=int, default=None,
+            help='Постов в одной транзакции, по умолчанию '
+                 'DELETION_BATCH_SIZE.')
+
+    def handle(self, *args, **options):
+        if options['user']:
+            delete = delete_user
+            obj = User.objects.filter(username=options['user']).first()
+        else:
+            delete = delete_group
+            obj = Group.objects.filter(slug=options['group']).first()
+        if obj is None:
+            raise CommandError(
+                f'Не найден: {options["user"] or options["group"]}')
+        done = delete(obj, batch_size=options['batch_size'],
+                      progress=self.progress)
+        self.stdout.write(f'Удалено: {obj}. Обработано постов: {done}.')
+
+    def progress(self, done, total):
+        self.stdout.write(f'Обработано постов: {done} из {total}.')
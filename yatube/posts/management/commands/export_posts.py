@@ -0,0 +1,126 @@
+import csv
+import gzip
+import io
+import resource
+import sys
+import time
+from contextlib import contextmanager
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+from posts.models import Post
+from posts.serializers import (POST_KEYS, POST_LOOKUPS, dumps, row_to_csv,
+                               row_to_dict)
+
+# Сколько строк читать из базы за один раз.
+CHUNK_SIZE = 2000
+
+
+def write_ndjson(stream, rows):
+    for row in rows:
+        stream.write(dumps(row_to_dict(row)) + '\n')
+        yield row
+
+
+def write_csv(stream, rows):
+    writer = csv.writer(stream)
+    writer.writerow(POST_KEYS)
+    for row in rows:
+        writer.writerow(row_to_csv(row))
+        yield row
+
+
+WRITERS = {'ndjson': write_ndjson, 'csv': write_csv}
+
+
+@contextmanager
+def open_output(path, compress):
+    """Текстовый поток в файл или stdout, при необходимости через gzip."""
+    if path == '-':
+        if compress:
+            with gzip.GzipFile(fileobj=sys.stdout.buffer, mode='wb') as raw:
+                with io.TextIOWrapper(raw, encoding='utf-8',
+                                      newline='') as stream:
+                    yield stream
+        else:
+            yield sys.stdout
+    elif compress:
+        with gzip.open(path, 'wt', encoding='utf-8', newline='') as stream:
+            yield stream
+    else:
+        with open(path, 'w', encoding='utf-8', newline='') as stream:
+            yield stream
+
+
+def peak_memory_mb():
+    # На Linux ru_maxrss в килобайтах.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class Command(BaseCommand):
+    help = ('Выгружает посты с username автора и slug группы в NDJSON или '
+            'CSV, читая базу порциями, по возрастанию (pub_date, id).')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', nargs='?', default='-',
+            help='Файл выгрузки, «-» — стандартный вывод.')
+        parser.add_argument(
+            '--format', choices=sorted(WRITERS),
+            help='Формат; по умолчанию по расширению файла, '
+                 'для стандартного вывода — ndjson.')
+        parser.add_argument(
+            '--gzip', action='store_true',
+            help='Сжимать выгрузку; включается сам для файлов *.gz.')
+        parser.add_argument(
+            '--since',
+            help='Выгружать посты, опубликованные не раньше этой даты.')
+        parser.add_argument(
+            '--after-id', type=int,
+            help='Вместе с --since: только посты после (since, after-id), '
+                 'то есть после водяного знака прошлой выгрузки.')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        compress = options['gzip'] or path.endswith('.gz')
+        name = path[:-3] if path.endswith('.gz') else path
+        fmt = options['format'] or (
+            'csv' if name.endswith('.csv') else 'ndjson')
+        posts = self.watermarked(
+            Post.objects.order_by('pub_date', 'id'),
+            options['since'], options['after_id'])
+        rows = posts.values_list(*POST_LOOKUPS).iterator(
+            chunk_size=CHUNK_SIZE)
+        started = time.monotonic()
+        count = 0
+        last = None
+        with open_output(path, compress) as stream:
+            for last in WRITERS[fmt](stream, rows):
+                count += 1
+        elapsed = time.monotonic() - started
+        self.stderr.write(
+            f'Выгружено постов: {count} за {elapsed:.1f} с '
+            f'({count / max(elapsed, 1e-6):.0f} строк/с), '
+            f'пик памяти {peak_memory_mb():.0f} МБ.')
+        if last is not None:
+            pub_date = last[POST_KEYS.index('pub_date')].isoformat()
+            post_id = last[POST_KEYS.index('id')]
+            self.stderr.write(
+                f'Следующая выгрузка: --since {pub_date} '
+                f'--after-id {post_id}')
+
+    def watermarked(self, posts, since, after_id):
+        if since is None:
+            if after_id is not None:
+                raise CommandError('--after-id задаётся вместе с --since.')
+            return posts
+        since = parse_datetime(since)
+        if since is None:
+            raise CommandError('--since: ожидается дата в формате ISO 8601.')
+        if after_id is None:
+            return posts.filter(pub_date__gte=since)
+        # Внешнее pub_date__gte даёт SQLite диапазон по индексу.
+        return posts.filter(
+            Q(pub_date__gte=since), Q(pub_date__gt=since) | Q(id__gt=after_id))
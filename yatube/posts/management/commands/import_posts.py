@@ -0,0 +1,221 @@
+import csv
+import json
+import sys
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from posts.bulk import bulk_create_with_dates
+from posts.cache import bump_feed_version
+from posts.counters import posts_imported
+from posts.formatting import render_text
+from posts.models import Group, Post
+from posts.timeline import refill_timelines
+
+User = get_user_model()
+
+
+def read_ndjson(stream):
+    for line in stream:
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            # Битая строка отклоняется как запись без текста.
+            yield {}
+
+
+def read_csv(stream):
+    yield from csv.DictReader(stream)
+
+
+READERS = {'ndjson': read_ndjson, 'csv': read_csv}
+
+
+def parse_date(value):
+    """Дата из ISO-строки в том виде, в каком её хранит база."""
+    moment = parse_datetime(value) if value else None
+    if moment is None:
+        return timezone.now()
+    if settings.USE_TZ and timezone.is_naive(moment):
+        return timezone.make_aware(moment)
+    if not settings.USE_TZ and timezone.is_aware(moment):
+        return timezone.make_naive(moment)
+    return moment
+
+
+class Lookup:
+    """Кеш id авторов или групп по username или slug.
+
+    Неизвестные ключи пакета ищутся в базе одним запросом, найденные
+    и отсутствующие запоминаются до конца импорта.
+    """
+
+    def __init__(self, model, field, create=None):
+        self.model = model
+        self.field = field
+        self.create = create
+        self.ids = {}
+
+    def resolve(self, keys):
+        missing = {key for key in keys if key and key not in self.ids}
+        if not missing:
+            return
+        found = dict(self.model.objects.filter(
+            **{f'{self.field}__in': missing}).values_list(self.field, 'pk'))
+        for key in missing:
+            if key not in found and self.create is not None:
+                found[key] = self.create(key).pk
+            self.ids[key] = found.get(key)
+
+    def get(self, key):
+        return self.ids.get(key)
+
+
+def create_author(username):
+    user = User(username=username)
+    user.set_unusable_password()
+    user.save()
+    return user
+
+
+def create_group(slug):
+    return Group.objects.create(title=slug, slug=slug)
+
+
+class Command(BaseCommand):
+    help = ('Импортирует посты из NDJSON или CSV с полями text, pub_date, '
+            'author (username) и group (slug) пакетами через bulk_create.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', nargs='?', default='-',
+            help='Файл для импорта, «-» — стандартный ввод.')
+        parser.add_argument(
+            '--format', choices=sorted(READERS),
+            help='Формат записей; по умолчанию по расширению файла, '
+                 'для стандартного ввода — ndjson.')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--skip', type=int, default=0,
+            help='Пропустить первые записи, уже импортированные раньше.')
+        parser.add_argument(
+            '--create-missing', action='store_true',
+            help='Создавать неизвестных авторов и группы, а не '
+                 'пропускать их посты.')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or (
+            'csv' if path.endswith('.csv') else 'ndjson')
+        create = options['create_missing']
+        self.authors = Lookup(User, 'username',
+                              create_author if create else None)
+        self.groups = Lookup(Group, 'slug', create_group if create else None)
+        self.author_counts = Counter()
+        self.group_counts = Counter()
+        self.imported = self.rejected = 0
+        self.started = time.monotonic()
+        if path == '-':
+            self.run(sys.stdin, fmt, options)
+        else:
+            with open(path, newline='', encoding='utf-8') as stream:
+                self.run(stream, fmt, options)
+        self.finish()
+
+    def run(self, stream, fmt, options):
+        skip = options['skip']
+        batch_size = options['batch_size']
+        done = skip
+        batch = []
+        for number, record in enumerate(READERS[fmt](stream), 1):
+            if number <= skip:
+                continue
+            batch.append(record)
+            if len(batch) == batch_size:
+                self.save_batch(batch, done)
+                done += len(batch)
+                batch = []
+                self.report(done, options['verbosity'])
+        if batch:
+            self.save_batch(batch, done)
+
+    def save_batch(self, records, done):
+        """Вставляет пакет в одной транзакции.
+
+        При ошибке подсказывает, с какой записи продолжить: все
+        предыдущие пакеты уже сохранены.
+        """
+        try:
+            with transaction.atomic():
+                self.insert(records)
+        except Exception as error:
+            self.finish()
+            raise CommandError(
+                f'Не удалось импортировать записи {done + 1}–'
+                f'{done + len(records)}: {error}. '
+                f'Продолжить можно с --skip {done}.')
+
+    def insert(self, records):
+        self.authors.resolve(record.get('author') for record in records)
+        self.groups.resolve(record.get('group') for record in records)
+        posts = []
+        for record in records:
+            author_id = self.authors.get(record.get('author'))
+            group_id = self.groups.get(record.get('group'))
+            if (not record.get('text') or author_id is None
+                    or (record.get('group') and group_id is None)):
+                self.rejected += 1
+                continue
+            pub_date = parse_date(record.get('pub_date'))
+            posts.append(Post(text=record['text'],
+                              text_html=render_text(record['text']),
+                              pub_date=pub_date, updated_at=pub_date,
+                              author_id=author_id, group_id=group_id))
+        bulk_create_with_dates(posts)
+        authors = Counter(post.author_id for post in posts)
+        groups = Counter(post.group_id for post in posts
+                         if post.group_id is not None)
+        posts_imported(authors, groups)
+        self.author_counts.update(authors)
+        self.group_counts.update(groups)
+        self.imported += len(posts)
+
+    def rate(self):
+        elapsed = time.monotonic() - self.started
+        return elapsed, self.imported / max(elapsed, 1e-6)
+
+    def report(self, done, verbosity):
+        if verbosity > 1:
+            _, rate = self.rate()
+            self.stdout.write(
+                f'Обработано записей: {done}, {rate:.0f} постов/с.')
+
+    def finish(self):
+        if self.imported:
+            self.refresh_feeds()
+        elapsed, rate = self.rate()
+        self.stdout.write(
+            f'Импортировано постов: {self.imported}, отклонено записей: '
+            f'{self.rejected} за {elapsed:.1f} с ({rate:.0f} постов/с).')
+
+    def refresh_feeds(self):
+        """Сбрасывает ленты и ленты подписчиков затронутых авторов."""
+        bump_feed_version('index')
+        usernames = User.objects.filter(
+            pk__in=self.author_counts).values_list('username', flat=True)
+        for username in usernames:
+            bump_feed_version('profile', username)
+        slugs = Group.objects.filter(
+            pk__in=self.group_counts).values_list('slug', flat=True)
+        for slug in slugs:
+            bump_feed_version('group', slug)
+        for author_id in self.author_counts:
+            refill_timelines(author_id)
@@ -0,0 +1,21 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from users.models import Profile
+
+from posts.counters import recount_groups, recount_profiles
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счётчики постов у авторов и групп.'
+
+    def handle(self, *args, **options):
+        missing = User.objects.filter(profile__isnull=True)
+        created = len(Profile.objects.bulk_create(
+            Profile(user=user) for user in missing.iterator()))
+        profiles = recount_profiles()
+        groups = recount_groups()
+        self.stdout.write(
+            f'Создано профилей: {created}. Исправлено счётчиков: '
+            f'авторов — {profiles}, групп — {groups}.')
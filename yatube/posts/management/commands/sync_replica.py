@@ -0,0 +1,72 @@
+import os
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+def copy_database(source, target):
+    """Копирует файл SQLite source в target через backup API.
+
+    Копия пишется одной транзакцией, поэтому читатели target видят
+    либо прежнее её состояние, либо новое, но не смесь. Пока она
+    пишется, читатели target ждут.
+    """
+    src = sqlite3.connect(source)
+    dst = sqlite3.connect(target)
+    try:
+        src.backup(dst)
+    finally:
+        src.close()
+        dst.close()
+
+
+class Command(BaseCommand):
+    help = ('Копирует базу default в файл реплики, а с --interval '
+            'повторяет копирование, пока команду не остановят.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='replica')
+        parser.add_argument(
+            '--interval', type=float, default=0,
+            help='Секунд между копированиями; 0 — скопировать один раз. '
+                 'Должно быть меньше REPLICA_STICKY_SECONDS.')
+
+    def handle(self, *args, **options):
+        alias = options['database']
+        if alias not in settings.DATABASES:
+            raise CommandError(f'Базы {alias} нет в DATABASES.')
+        source = settings.DATABASES['default']
+        target = settings.DATABASES[alias]
+        for database in (source, target):
+            if database['ENGINE'] != 'django.db.backends.sqlite3':
+                raise CommandError('Копировать умею только базы SQLite.')
+        if os.path.abspath(source['NAME']) == os.path.abspath(
+                target['NAME']):
+            raise CommandError(f'{alias} и default — один и тот же файл.')
+        while True:
+            self.copy(source['NAME'], target['NAME'], options['interval'])
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
+
+    def copy(self, source, target, interval=0):
+        """Копирует базу и предупреждает, если реплика может отстать
+        больше чем на REPLICA_STICKY_SECONDS.
+
+        Правка попадает в реплику не позже, чем через interval плюс
+        время копии. Если это дольше окна, cookie после записи истекает
+        раньше, чем реплика получает правку.
+        """
+        started = time.monotonic()
+        copy_database(source, target)
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            f'База скопирована в {target} за {elapsed:.1f} с.')
+        if interval + elapsed > settings.REPLICA_STICKY_SECONDS:
+            self.stderr.write(self.style.WARNING(
+                f'Реплика отстаёт дольше REPLICA_STICKY_SECONDS '
+                f'({settings.REPLICA_STICKY_SECONDS} с): клиенты могут '
+                f'не увидеть своих правок. Копируйте чаще, увеличьте окно '
+                f'или перейдите на настоящую репликацию.'))
@@ -0,0 +1,26 @@
+# Generated by Django 2.2.28 on 2026-10-18 19:16
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def count_group_posts(apps, schema_editor):
+    Group = apps.get_model('posts', 'Group')
+    for group in Group.objects.annotate(count=Count('posts')).iterator():
+        Group.objects.filter(pk=group.pk).update(posts_count=group.count)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0004_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='group',
+            name='posts_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Записей'),
+        ),
+        migrations.RunPython(count_group_posts, migrations.RunPython.noop),
+    ]
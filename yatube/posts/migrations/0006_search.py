@@ -0,0 +1,14 @@
+from django.db import migrations
+
+from posts.fts import create_fts, drop_fts
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0005_group_posts_count'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts, drop_fts),
+    ]
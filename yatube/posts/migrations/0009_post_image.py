@@ -0,0 +1,22 @@
+# Generated by Django 2.2.28 on 2026-10-18 19:30
+
+from django.db import migrations, models
+
+from posts.fts import install_triggers
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0008_follow'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='image',
+            field=models.ImageField(blank=True, null=True, upload_to='posts/', verbose_name='Картинка'),
+        ),
+        # Добавление поля пересоздаёт таблицу на SQLite вместе с триггерами.
+        migrations.RunPython(install_triggers, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 2.2.28 on 2026-10-18 19:36
+
+from django.db import migrations, models
+
+from posts.fts import install_triggers
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0009_post_image'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='text_html',
+            field=models.TextField(blank=True, editable=False, verbose_name='HTML текста'),
+        ),
+        # Добавление поля пересоздаёт таблицу на SQLite вместе с триггерами.
+        # Старые посты заполняет команда render_posts_html, до этого
+        # шаблоны выводят text через linebreaksbr.
+        migrations.RunPython(install_triggers, migrations.RunPython.noop),
+    ]
@@ -1,30 +1,122 @@
 from django.contrib.auth import get_user_model
 from django.db import models
 
+from .formatting import render_text
+
 User = get_user_model()
 
+# Поля, которые нужны карточкам постов в лентах.
+FEED_FIELDS = (
+    'text', 'text_html', 'pub_date', 'updated_at',
+    'author', 'author__username', 'author__first_name', 'author__last_name',
+    'group', 'group__title', 'group__slug', 'image',
+)
+
+
+class FeedManager(models.Manager):
+    """Посты вместе с автором и группой за один запрос."""
+
+    def get_queryset(self):
+        return super().get_queryset().select_related(
+            'author', 'group').only(*FEED_FIELDS)
+
 
 class Post(models.Model):
     text = models.TextField(verbose_name="Комментарий")
+    text_html = models.TextField("HTML текста", blank=True, editable=False)
     pub_date = models.DateTimeField("Дата публикации",
                                     auto_now_add=True)
+    updated_at = models.DateTimeField("Дата изменения", auto_now=True)
     author = models.ForeignKey(User, on_delete=models.CASCADE,
                                related_name="posts", verbose_name="Автор")
     group = models.ForeignKey("Group", on_delete=models.SET_NULL,
                               related_name="posts", blank=True, null=True,
                               verbose_name="Группа")
+    image = models.ImageField("Картинка", upload_to="posts/",
+                              blank=True, null=True)
+
+    objects = models.Manager()
+    feed = FeedManager()
 
     class Meta:
         ordering = ["-pub_date"]
+        indexes = [
+            models.Index(fields=["pub_date", "id"],
+                         name="posts_pub_date_id_idx"),
+            models.Index(fields=["group", "pub_date"],
+                         name="posts_group_pub_date_idx"),
+            models.Index(fields=["author", "pub_date"],
+                         name="posts_author_pub_date_idx"),
+            models.Index(fields=["updated_at"],
+                         name="posts_updated_at_idx"),
+            models.Index(fields=["group", "updated_at"],
+                         name="posts_group_updated_at_idx"),
+            models.Index(fields=["author", "updated_at"],
+                         name="posts_author_updated_at_idx"),
+        ]
 
     def __str__(self):
         return self.text[:15]
 
+    def save(self, *args, **kwargs):
+        self.text_html = render_text(self.text)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'text' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'text_html'}
+        super().save(*args, **kwargs)
+
 
 class Group(models.Model):
     title = models.CharField(max_length=200)
     slug = models.SlugField(unique=True)
     description = models.TextField()
+    posts_count = models.PositiveIntegerField("Записей", default=0)
 
     def __str__(self):
         return self.title
+
+
+class Follow(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE,
+                             related_name="follower",
+                             verbose_name="Подписчик")
+    author = models.ForeignKey(User, on_delete=models.CASCADE,
+                               related_name="following",
+                               verbose_name="Автор")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "author"],
+                                    name="unique_follow"),
+        ]
+
+    def __str__(self):
+        return f"{self.user} → {self.author}"
+
+
+class TimelineEntry(models.Model):
+    """Пост в заранее собранной ленте подписок пользователя.
+
+    Дата публикации и автор продублированы из поста: лента читается
+    одним проходом по индексу (user, pub_date, post), а отписка удаляет
+    записи автора без соединения с постами.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE,
+                             related_name="timeline")
+    post = models.ForeignKey(Post, on_delete=models.CASCADE,
+                             related_name="timeline_entries")
+    author = models.ForeignKey(User, on_delete=models.CASCADE,
+                               related_name="+")
+    pub_date = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "post"],
+                                    name="unique_timeline_entry"),
+        ]
+        indexes = [
+            models.Index(fields=["user", "pub_date", "post"],
+                         name="posts_timeline_feed_idx"),
+            models.Index(fields=["user", "author"],
+                         name="posts_timeline_author_idx"),
+        ]
@@ -0,0 +1,258 @@
+import base64
+import binascii
+import datetime as dt
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Page, Paginator
+from django.db import DatabaseError, connections
+from django.db.models import Q, QuerySet
+from django.utils.functional import cached_property
+
+# GET-параметры, которыми задаётся страница ленты.
+PAGE_PARAMS = ('page', 'after', 'before')
+
+
+def encode_cursor(post):
+    """Упаковывает (pub_date, id) поста в непрозрачный токен."""
+    raw = f'{post.pub_date.isoformat()}|{post.pk}'.encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Возвращает (pub_date, id) или None для битого токена."""
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        pub_date, pk = raw.decode().split('|')
+        return dt.datetime.fromisoformat(pub_date), int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+
+
+# Сколько номеров показывать по обе стороны от текущей страницы.
+PAGE_WINDOW = 2
+
+
+class WindowedPage(Page):
+    """Страница, которая знает, какие номера страниц показывать."""
+
+    @property
+    def page_window(self):
+        """Первая, последняя и соседние с текущей страницы.
+
+        Пропуски обозначены None. Длина списка не зависит от числа
+        страниц, поэтому и отрисовка пагинатора тоже.
+        """
+        if self.number is None:
+            return []
+        last = self.paginator.num_pages
+        start = max(self.number - PAGE_WINDOW, 1)
+        end = min(self.number + PAGE_WINDOW, last)
+        pages = []
+        if start > 1:
+            pages.append(1)
+            if start > 2:
+                pages.append(None)
+        pages.extend(range(start, end + 1))
+        if end < last:
+            if end < last - 1:
+                pages.append(None)
+            pages.append(last)
+        return pages
+
+
+def table_estimate(queryset):
+    """Число строк таблицы по статистике СУБД, без COUNT(*).
+
+    Годится только для выборок без условий; если статистики нет
+    (на SQLite её собирает ANALYZE), возвращает None.
+    """
+    if queryset.query.has_filters():
+        return None
+    connection = connections[queryset.db]
+    table = queryset.model._meta.db_table
+    if connection.vendor == 'sqlite':
+        sql = 'SELECT stat FROM sqlite_stat1 WHERE tbl = %s'
+    elif connection.vendor == 'postgresql':
+        sql = 'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass'
+    else:
+        return None
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [table])
+            rows = cursor.fetchall()
+    except DatabaseError:
+        return None
+    # В sqlite_stat1 первое число каждой строки — размер таблицы.
+    estimate = max((int(str(row[0]).split()[0]) for row in rows), default=0)
+    return estimate if estimate > 0 else None
+
+
+class WindowedPaginator(Paginator):
+    """Пагинатор с окном номеров страниц и приблизительным числом
+    объектов для больших выборок.
+
+    Выше PAGINATOR_EXACT_COUNT_LIMIT число объектов берётся из кеша,
+    где точный COUNT(*) хранится PAGINATOR_COUNT_CACHE_TIMEOUT секунд,
+    а с PAGINATOR_TABLE_STATS — ещё и из статистики таблицы. Меньшие
+    выборки считаются точно при каждом запросе.
+    """
+
+    count_is_approximate = False
+
+    def _get_page(self, *args, **kwargs):
+        return WindowedPage(*args, **kwargs)
+
+    def count_cache_key(self):
+        sql, params = self.object_list.query.sql_with_params()
+        raw = f'{self.object_list.db}:{sql}:{params}'
+        return 'paginator-count:' + hashlib.md5(raw.encode()).hexdigest()
+
+    @cached_property
+    def count(self):
+        if not isinstance(self.object_list, QuerySet):
+            return super().count
+        limit = settings.PAGINATOR_EXACT_COUNT_LIMIT
+        key = self.count_cache_key()
+        estimate = cache.get(key)
+        if estimate is None and settings.PAGINATOR_TABLE_STATS:
+            estimate = table_estimate(self.object_list)
+        if estimate is not None and estimate >= limit:
+            self.count_is_approximate = True
+            return estimate
+        count = super().count
+        if count >= limit:
+            cache.set(key, count, settings.PAGINATOR_COUNT_CACHE_TIMEOUT)
+        return count
+
+
+class CursorPage(WindowedPage):
+    """Страница ленты, совместимая с Page.
+
+    Страницы, полученные по курсору, не знают своего номера
+    (number равен None) и не требуют COUNT(*).
+    """
+
+    def __init__(self, object_list, number, paginator,
+                 has_next=None, has_previous=None):
+        super().__init__(object_list, number, paginator)
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def has_next(self):
+        if self._has_next is None:
+            return super().has_next()
+        return self._has_next
+
+    def has_previous(self):
+        if self._has_previous is None:
+            return super().has_previous()
+        return self._has_previous
+
+    def next_page_number(self):
+        if self.number is None:
+            return None
+        return super().next_page_number()
+
+    def previous_page_number(self):
+        if self.number is None:
+            return None
+        return super().previous_page_number()
+
+    @property
+    def next_cursor(self):
+        if self.has_next() and self.object_list:
+            return encode_cursor(self.object_list[-1])
+        return None
+
+    @property
+    def previous_cursor(self):
+        if self.has_previous() and self.object_list:
+            return encode_cursor(self.object_list[0])
+        return None
+
+
+class CursorPaginator(WindowedPaginator):
+    """Пагинатор по ключу (pub_date, id) для лент постов.
+
+    Переход по ?after=/?before= выполняется без OFFSET и COUNT(*),
+    ?page=N остаётся для старых ссылок.
+    """
+
+    # Поля ключа в object_list: дата публикации и id поста.
+    date_field = 'pub_date'
+    id_field = 'id'
+    # Номер есть только у страниц, найденных через ?page=N, и у первой.
+    numbered = True
+
+    def __init__(self, object_list, per_page, count=None, **kwargs):
+        ordering = (f'-{self.date_field}', f'-{self.id_field}')
+        super().__init__(object_list.order_by(*ordering), per_page, **kwargs)
+        if count is not None:
+            # Число постов из счётчика избавляет от COUNT(*).
+            self.count = count
+
+    def _get_page(self, *args, **kwargs):
+        return CursorPage(*args, **kwargs)
+
+    def page(self, number):
+        page = super().page(number)
+        page.object_list = list(page.object_list)
+        return page
+
+    def after(self, cursor):
+        """Посты ленты, идущие после курсора.
+
+        Условие на pub_date вне OR лишнее по смыслу, но без него SQLite
+        не видит диапазона и обходит индекс с самого начала ленты.
+        """
+        pub_date, pk = cursor
+        return self.object_list.filter(
+            Q(**{f'{self.date_field}__lte': pub_date}),
+            Q(**{f'{self.date_field}__lt': pub_date})
+            | Q(**{f'{self.id_field}__lt': pk}))
+
+    def before(self, cursor):
+        """Посты перед курсором в обратном порядке, ближайшие первыми."""
+        pub_date, pk = cursor
+        return self.object_list.filter(
+            Q(**{f'{self.date_field}__gte': pub_date}),
+            Q(**{f'{self.date_field}__gt': pub_date})
+            | Q(**{f'{self.id_field}__gt': pk})
+        ).reverse()
+
+    def fetch(self, after=None, before=None):
+        """До per_page + 1 постов от курсора в порядке обхода."""
+        if before is not None:
+            posts = self.before(before)
+        elif after is not None:
+            posts = self.after(after)
+        else:
+            posts = self.object_list
+        return list(posts[:self.per_page + 1])
+
+    def cursor_page(self, after=None, before=None):
+        """Страница, следующая за курсором after или предшествующая before.
+
+        Без курсоров возвращает начало ленты.
+        """
+        posts = self.fetch(after=after, before=before)
+        more = len(posts) > self.per_page
+        posts = posts[:self.per_page]
+        if before is not None:
+            return self._get_page(posts[::-1], None, self,
+                                  has_next=True, has_previous=more)
+        number = 1 if after is None and self.numbered else None
+        return self._get_page(posts, number, self, has_next=more,
+                              has_previous=after is not None)
+
+    def get_page_from_request(self, params):
+        """Выбирает страницу по ?after=, ?before= или ?page= из GET."""
+        after = decode_cursor(params.get('after'))
+        before = decode_cursor(params.get('before'))
+        if after is not None or before is not None or not self.numbered:
+            return self.cursor_page(after=after, before=before)
+        return self.get_page(params.get('page'))
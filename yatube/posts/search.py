@@ -0,0 +1,60 @@
+import re
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from .models import Group, Post
+
+# FTS5-таблица для каждой модели, по которой работает поиск.
+FTS_TABLES = {
+    Post: 'posts_post_fts',
+    Group: 'posts_group_fts',
+}
+# Поиск без FTS5 (на других СУБД): обычный LIKE по тем же полям.
+FALLBACK_FIELDS = {
+    Post: ('text',),
+    Group: ('title', 'description'),
+}
+WORD = re.compile(r'\w+')
+
+
+def fts_available():
+    return connection.vendor == 'sqlite'
+
+
+def fts_query(text):
+    """Превращает ввод пользователя в безопасный запрос FTS5.
+
+    Каждое слово берётся в кавычки как префикс, поэтому операторы
+    и спецсимволы FTS5 из строки поиска не интерпретируются.
+    """
+    return ' '.join(f'"{word}"*' for word in WORD.findall(text))
+
+
+def matching_ids(model, text):
+    """Подзапрос с id объектов, найденных полнотекстовым поиском."""
+    table = FTS_TABLES[model]
+    return RawSQL(f'SELECT rowid FROM {table} WHERE {table} MATCH %s',
+                  (fts_query(text),))
+
+
+def search(queryset, text):
+    """Фильтрует queryset по тексту, лучшие совпадения (bm25) первыми."""
+    model = queryset.model
+    if not fts_query(text):
+        return queryset.none()
+    if not fts_available():
+        condition = Q()
+        for field in FALLBACK_FIELDS[model]:
+            condition |= Q(**{f'{field}__icontains': text})
+        return queryset.filter(condition)
+    table = FTS_TABLES[model]
+    return queryset.extra(
+        tables=[table],
+        where=[f'{table}.rowid = {model._meta.db_table}.id',
+               f'{table} MATCH %s'],
+        params=[fts_query(text)],
+        select={'rank': f'bm25({table})'},
+        order_by=['rank', '-id'],
+    )
@@ -0,0 +1,58 @@
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+# Поля поста в API и выгрузках: ключ в JSON и путь для values_list.
+POST_FIELDS = (
+    ('id', 'id'),
+    ('text', 'text'),
+    ('pub_date', 'pub_date'),
+    ('author', 'author__username'),
+    ('group', 'group__slug'),
+)
+POST_KEYS = tuple(key for key, _ in POST_FIELDS)
+POST_LOOKUPS = tuple(lookup for _, lookup in POST_FIELDS)
+
+
+def dumps(data):
+    return json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False)
+
+
+def post_to_dict(post):
+    """Пост из Post.feed: автор и группа уже загружены."""
+    return {
+        'id': post.pk,
+        'text': post.text,
+        'pub_date': post.pub_date,
+        'author': post.author.username,
+        'group': post.group.slug if post.group is not None else None,
+    }
+
+
+def row_to_dict(row):
+    """Строка values_list(*POST_LOOKUPS) в том же виде, что post_to_dict."""
+    return dict(zip(POST_KEYS, row))
+
+
+def row_to_csv(row):
+    """Строка values_list(*POST_LOOKUPS) для csv.writer: даты в ISO,
+    как в JSON, пустая группа — пустая строка."""
+    return [value.isoformat() if hasattr(value, 'isoformat') else value
+            for value in row]
+
+
+def group_to_dict(group):
+    return {
+        'title': group.title,
+        'slug': group.slug,
+        'description': group.description,
+        'posts_count': group.posts_count,
+    }
+
+
+def author_to_dict(user):
+    return {
+        'username': user.username,
+        'first_name': user.first_name,
+        'last_name': user.last_name,
+    }
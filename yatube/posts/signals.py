@@ -0,0 +1,128 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .cache import bump_feed_version, bump_post_feeds
+from .counters import post_added, post_moved, post_removed
+from .deletion import in_batch_deletion
+from .lookups import authors, groups
+from .models import Group, Post
+from .tasks import generate_thumbnail
+
+User = get_user_model()
+
+# Поле, по которому строка видна в адресах лент и в кешах.
+URL_FIELDS = {Group: 'slug', User: 'username'}
+
+
+@receiver(pre_save, sender=Group)
+@receiver(pre_save, sender=User)
+def remember_previous_key(sender, instance, raw, update_fields, **kwargs):
+    """Запоминает slug или username из базы до сохранения.
+
+    После переименования ленты и кеши сбрасываются и по старому
+    ключу, иначе старый адрес отдавал бы закешированную страницу.
+    """
+    field = URL_FIELDS[sender]
+    instance._previous_key = None
+    if raw or instance.pk is None:
+        return
+    if update_fields is not None and field not in update_fields:
+        return
+    instance._previous_key = sender._default_manager.filter(
+        pk=instance.pk).values_list(field, flat=True).first()
+
+
+def url_keys(instance):
+    """Текущий и, если строку переименовали, прежний ключ."""
+    keys = {getattr(instance, URL_FIELDS[type(instance)])}
+    previous = getattr(instance, '_previous_key', None)
+    if previous is not None:
+        keys.add(previous)
+    return keys
+
+
+@receiver(post_save, sender=Post)
+def count_new_post(sender, instance, created, raw, **kwargs):
+    if created and not raw:
+        post_added(instance)
+
+
+@receiver(pre_save, sender=Post)
+def remember_previous_group(sender, instance, raw, update_fields, **kwargs):
+    """Запоминает группу поста в базе до сохранения."""
+    instance._previous_group_id = instance.group_id
+    if raw or instance.pk is None:
+        return
+    if update_fields is not None and 'group' not in update_fields:
+        return
+    instance._previous_group_id = Post.objects.filter(
+        pk=instance.pk).values_list('group_id', flat=True).first()
+
+
+@receiver(post_save, sender=Post)
+def count_moved_post(sender, instance, created, raw, **kwargs):
+    # Перенос считается при любой правке: со страницы поста, в админке
+    # или из консоли.
+    old_group_id = getattr(instance, '_previous_group_id', instance.group_id)
+    if created or raw or old_group_id == instance.group_id:
+        return
+    post_moved(old_group_id, instance.group_id)
+    if old_group_id is not None:
+        for slug in Group.objects.filter(pk=old_group_id).values_list(
+                'slug', flat=True):
+            bump_feed_version('group', slug)
+
+
+@receiver(post_delete, sender=Post)
+def count_removed_post(sender, instance, **kwargs):
+    if not in_batch_deletion():
+        post_removed(instance)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_feeds(sender, instance, signal, **kwargs):
+    if signal is post_save or not in_batch_deletion():
+        bump_post_feeds(instance)
+
+
+@receiver(post_save, sender=Post)
+def pregenerate_thumbnails(sender, instance, raw, **kwargs):
+    # Миниатюра создаётся заранее, до первого просмотра ленты.
+    if not raw and instance.image:
+        generate_thumbnail.delay(instance.pk)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_group_feed(sender, instance, **kwargs):
+    for slug in url_keys(instance):
+        bump_feed_version('group', slug)
+
+
+@receiver(post_save, sender=User)
+def invalidate_author_feeds(sender, instance, created, update_fields,
+                            **kwargs):
+    # Вход в систему сохраняет только last_login — ленты не меняются.
+    if created or update_fields == frozenset({'last_login'}):
+        return
+    bump_feed_version('index')
+    for username in url_keys(instance):
+        bump_feed_version('profile', username)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def forget_group(sender, instance, **kwargs):
+    for slug in url_keys(instance):
+        groups.forget(slug)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_author(sender, instance, **kwargs):
+    # Новый пользователь мог занять имя удалённого, поэтому сбрасывается
+    # и запись о только что созданном.
+    for username in url_keys(instance):
+        authors.forget(username)
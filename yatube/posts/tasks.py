@@ -0,0 +1,58 @@
+import logging
+
+from django.contrib.auth import get_user_model
+from sorl.thumbnail import get_thumbnail
+from tasks.queue import task
+
+from .deletion import delete_group, delete_user
+from .models import Group, Post
+from .thumbnails import CARD_GEOMETRY, CARD_OPTIONS
+from .timeline import fan_out
+
+logger = logging.getLogger(__name__)
+User = get_user_model()
+
+
+@task
+def fan_out_post(post_id):
+    """Раскладывает новый пост по лентам подписчиков.
+
+    Повтор безопасен: записи, уже попавшие в ленты, пропускаются.
+    """
+    # Пост могли удалить, пока задача ждала в очереди.
+    post = Post.objects.filter(pk=post_id).first()
+    if post is not None:
+        fan_out(post)
+
+
+@task
+def generate_thumbnail(post_id):
+    """Создаёт миниатюру картинки поста для карточки в ленте."""
+    post = Post.objects.filter(pk=post_id).only('image').first()
+    if post is not None and post.image:
+        get_thumbnail(post.image, CARD_GEOMETRY, **CARD_OPTIONS)
+
+
+def logged_progress(obj):
+    def progress(done, total):
+        logger.info('%s: обработано постов %s из %s', obj, done, total)
+    return progress
+
+
+@task
+def delete_user_in_batches(user_id):
+    """Удаляет пользователя порциями постов, см. posts/deletion.py.
+
+    Повтор после сбоя продолжает с оставшихся постов.
+    """
+    user = User.objects.filter(pk=user_id).first()
+    if user is not None:
+        delete_user(user, progress=logged_progress(user))
+
+
+@task
+def delete_group_in_batches(group_id):
+    """Удаляет группу, порциями открепляя её посты."""
+    group = Group.objects.filter(pk=group_id).first()
+    if group is not None:
+        delete_group(group, progress=logged_progress(group))
@@ -0,0 +1,35 @@
+from django import template
+
+from posts.fragments import render_fragments
+from posts.paginator import PAGE_PARAMS
+from posts.thumbnails import card_thumbnail
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def page_url(context, **params):
+    """Ссылка на другую страницу с сохранением остальных GET-параметров."""
+    query = context['request'].GET.copy()
+    for name in PAGE_PARAMS:
+        query.pop(name, None)
+    for name, value in params.items():
+        query[name] = value
+    return f'?{query.urlencode()}'
+
+
+@register.simple_tag
+def post_thumbnail(image):
+    """Миниатюра картинки поста, созданная заранее при загрузке."""
+    return card_thumbnail(image)
+
+
+@register.simple_tag
+def post_fragments(posts, template_name):
+    """Карточки постов страницы из кеша за одно обращение к нему."""
+    return render_fragments(posts, template_name)
+
+
+@register.simple_tag
+def post_fragment(post, template_name):
+    return render_fragments([post], template_name)[0][1]
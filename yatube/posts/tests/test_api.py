@@ -0,0 +1,112 @@
+import json
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class APITest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='name', first_name='Имя', last_name='Фамилия')
+        cls.group = Group.objects.create(
+            title='testgroup',
+            slug='test-slug',
+            description='Описание')
+        for i in range(1, 16):
+            Post.objects.create(text=f'Тестовый текст{i}', author=cls.user,
+                                group=cls.group if i % 2 else None)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_feed_pages_follow_cursors(self):
+        """Лента API листается курсорами без пропусков и повторов."""
+        url = reverse('posts:api_index')
+        first = self.guest_client.get(url).json()
+        self.assertEqual(len(first['results']), 10)
+        self.assertIsNone(first['previous'])
+        second = self.guest_client.get(url, {'after': first['next']}).json()
+        self.assertEqual(len(second['results']), 5)
+        self.assertIsNone(second['next'])
+        ids = [post['id'] for post in first['results'] + second['results']]
+        self.assertEqual(
+            ids, list(Post.objects.order_by('-pub_date', '-id')
+                      .values_list('id', flat=True)))
+        back = self.guest_client.get(
+            url, {'before': second['previous']}).json()
+        self.assertEqual(back['results'], first['results'])
+
+    def test_feed_query_count(self):
+        """Страница API не считает посты и не ходит за авторами."""
+        with self.assertNumQueries(2):
+            response = self.guest_client.get(reverse('posts:api_index'))
+        self.assertEqual(response['Content-Type'], 'application/json')
+
+    def test_group_and_profile_feeds(self):
+        """Ленты группы и автора содержат их описание и их посты."""
+        response = self.guest_client.get(
+            reverse('posts:api_group_posts', kwargs={'slug': 'test-slug'}))
+        data = response.json()
+        self.assertEqual(data['group']['title'], 'testgroup')
+        self.assertEqual(data['group']['posts_count'], 8)
+        self.assertTrue(all(
+            post['group'] == 'test-slug' for post in data['results']))
+        response = self.guest_client.get(
+            reverse('posts:api_profile', kwargs={'username': 'name'}))
+        data = response.json()
+        self.assertEqual(data['author']['first_name'], 'Имя')
+        self.assertEqual(len(data['results']), 10)
+        response = self.guest_client.get(
+            reverse('posts:api_group_posts', kwargs={'slug': 'unknown'}))
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_api_and_html_feeds_are_cached_separately(self):
+        """Закешированная HTML-страница не отдаётся вместо JSON."""
+        self.guest_client.get(reverse('posts:index'))
+        response = self.guest_client.get(reverse('posts:api_index'))
+        self.assertEqual(len(response.json()['results']), 10)
+
+    def test_single_post(self):
+        post = Post.objects.filter(group=self.group).first()
+        response = self.guest_client.get(reverse(
+            'posts:api_post_view',
+            kwargs={'username': 'name', 'post_id': post.pk}))
+        data = response.json()
+        self.assertEqual(data['text'], post.text)
+        self.assertEqual(data['author'], 'name')
+        self.assertEqual(data['group'], 'test-slug')
+        self.assertIn('ETag', response)
+
+    def test_export_streams_ndjson(self):
+        """Выгрузка отдаётся потоком, по посту на строку."""
+        response = self.guest_client.get(reverse('posts:api_export'))
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        rows = [json.loads(line) for line in lines]
+        self.assertEqual(
+            [row['id'] for row in rows],
+            list(Post.objects.order_by('id').values_list('id', flat=True)))
+        self.assertEqual(
+            set(rows[0]), {'id', 'text', 'pub_date', 'author', 'group'})
+
+    def test_export_filters_and_resumes(self):
+        last_id = Post.objects.order_by('id')[4].pk
+        response = self.guest_client.get(
+            reverse('posts:api_export'),
+            {'after_id': last_id, 'group': 'test-slug'})
+        rows = [json.loads(line) for line in
+                b''.join(response.streaming_content).splitlines()]
+        self.assertEqual(
+            [row['id'] for row in rows],
+            list(Post.objects.filter(id__gt=last_id, group=self.group)
+                 .order_by('id').values_list('id', flat=True)))
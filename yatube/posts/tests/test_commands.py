@@ -0,0 +1,259 @@
+import datetime as dt
+import gzip
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..management.commands.check_feed_plans import plan_problems
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class CheckFeedPlansCommandTest(TestCase):
+    def test_feed_queries_use_indexes(self):
+        """Запросы лент не сканируют таблицу постов и не сортируют
+        во временном B-дереве."""
+        out = StringIO()
+        call_command('check_feed_plans', stdout=out)
+        self.assertIn('используют индексы', out.getvalue())
+
+    def test_index_walk_is_reported(self):
+        """Обход индекса с начала ленты вместо поиска диапазона —
+        ошибка, даже если сортировка не нужна."""
+        walk = ['SCAN posts_post USING INDEX posts_pub_date_id_idx']
+        self.assertTrue(plan_problems(walk, 'pub_date<?'))
+        self.assertFalse(plan_problems(walk, None))
+        self.assertFalse(plan_problems(
+            ['SEARCH posts_post USING INDEX posts_pub_date_id_idx '
+             '(pub_date<?)'], 'pub_date<?'))
+
+
+class RecountPostsCommandTest(TestCase):
+    def test_recount_fixes_drifted_counters(self):
+        """recount_posts исправляет разошедшиеся счётчики."""
+        user = User.objects.create_user(username='name')
+        group = Group.objects.create(title='testgroup', slug='test-slug',
+                                     description='Описание')
+        Post.objects.bulk_create(
+            Post(text='Тестовый текст', author=user, group=group)
+            for _ in range(3))
+        out = StringIO()
+        call_command('recount_posts', stdout=out)
+        user.profile.refresh_from_db()
+        group.refresh_from_db()
+        self.assertEqual(user.profile.posts_count, 3)
+        self.assertEqual(group.posts_count, 3)
+        self.assertIn('авторов — 1, групп — 1', out.getvalue())
+
+
+class ImportPostsCommandTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='name')
+        cls.group = Group.objects.create(title='testgroup', slug='test-slug',
+                                         description='Описание')
+
+    def import_posts(self, content, suffix='.ndjson', *args):
+        with tempfile.NamedTemporaryFile(
+                'w', suffix=suffix, encoding='utf-8', delete=False) as file:
+            file.write(content)
+        self.addCleanup(os.remove, file.name)
+        out = StringIO()
+        call_command('import_posts', file.name, *args, stdout=out)
+        return out.getvalue()
+
+    def test_import_keeps_dates_and_updates_counters(self):
+        """Импорт сохраняет даты из файла и обновляет счётчики, не
+        трогая даты постов, созданных до него."""
+        existing = Post.objects.create(text='Раньше', author=self.user)
+        records = [
+            {'text': 'Первый', 'pub_date': '2019-01-02T03:04:05',
+             'author': 'name', 'group': 'test-slug'},
+            {'text': 'Второй', 'pub_date': '2019-01-03T03:04:05',
+             'author': 'name', 'group': None},
+            {'text': 'Чужой', 'author': 'unknown'},
+        ]
+        content = '\n'.join(json.dumps(record) for record in records)
+        out = self.import_posts(content + '\n{broken', '.ndjson',
+                                '--batch-size', '2')
+        self.assertIn('Импортировано постов: 2, отклонено записей: 2', out)
+        post = Post.objects.get(text='Первый')
+        self.assertEqual(post.pub_date, dt.datetime(2019, 1, 2, 3, 4, 5))
+        self.assertEqual(post.updated_at, post.pub_date)
+        self.assertEqual(Post.objects.get(text='Второй').pub_date,
+                         dt.datetime(2019, 1, 3, 3, 4, 5))
+        self.assertEqual(
+            Post.objects.get(pk=existing.pk).updated_at, existing.updated_at)
+        self.user.profile.refresh_from_db()
+        self.group.refresh_from_db()
+        self.assertEqual(self.user.profile.posts_count, 3)
+        self.assertEqual(self.group.posts_count, 1)
+        new_post = Post.objects.create(text='Новый', author=self.user)
+        self.assertGreater(new_post.pub_date, post.pub_date)
+
+    def test_import_csv_creates_missing_and_resumes(self):
+        """CSV-импорт создаёт авторов и группы и пропускает записи,
+        импортированные раньше."""
+        content = ('text,pub_date,author,group\n'
+                   'Первый,2019-01-02T03:04:05,name,\n'
+                   'Второй,2019-01-03T03:04:05,new-author,new-group\n')
+        self.import_posts(content, '.csv', '--create-missing', '--skip', '1')
+        post = Post.objects.get()
+        self.assertEqual(post.text, 'Второй')
+        self.assertEqual(post.author.username, 'new-author')
+        self.assertEqual(post.author.profile.posts_count, 1)
+        self.assertEqual(post.group.slug, 'new-group')
+        self.assertEqual(post.group.posts_count, 1)
+
+
+class ExportPostsCommandTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='name')
+        cls.group = Group.objects.create(title='testgroup', slug='test-slug',
+                                         description='Описание')
+        for i in range(5):
+            Post.objects.create(text=f'Тестовый текст{i}', author=cls.user,
+                                group=cls.group if i % 2 else None)
+
+    def export_posts(self, suffix, *args):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, f'posts{suffix}')
+        err = StringIO()
+        call_command('export_posts', path, *args, stderr=err)
+        return path, err.getvalue()
+
+    def test_export_ndjson_and_resume_from_watermark(self):
+        """Выгрузка идёт по (pub_date, id) и продолжается
+        с водяного знака."""
+        path, err = self.export_posts('.ndjson')
+        with open(path, encoding='utf-8') as file:
+            rows = [json.loads(line) for line in file]
+        self.assertEqual(
+            [row['id'] for row in rows],
+            list(Post.objects.order_by('pub_date', 'id')
+                 .values_list('id', flat=True)))
+        self.assertEqual(rows[1]['group'], 'test-slug')
+        self.assertIn('Выгружено постов: 5', err)
+        self.assertIn('строк/с', err)
+        watermark = err.split('Следующая выгрузка: ')[1].split()
+        post = Post.objects.create(text='Новый', author=self.user)
+        path, err = self.export_posts('.ndjson', *watermark)
+        with open(path, encoding='utf-8') as file:
+            rows = [json.loads(line) for line in file]
+        self.assertEqual([row['id'] for row in rows], [post.pk])
+
+    def test_export_gzip_csv_can_be_imported(self):
+        """Сжатый CSV читается обратно командой import_posts."""
+        path, _ = self.export_posts('.csv.gz')
+        with gzip.open(path, 'rt', encoding='utf-8', newline='') as file:
+            content = file.read()
+        self.assertTrue(content.startswith('id,text,pub_date,author,group'))
+        dates = list(Post.objects.values_list('pub_date', flat=True))
+        Post.objects.all().delete()
+        csv_path = path[:-3]
+        with open(csv_path, 'w', encoding='utf-8', newline='') as file:
+            file.write(content)
+        call_command('import_posts', csv_path, stdout=StringIO())
+        self.assertCountEqual(
+            Post.objects.values_list('pub_date', flat=True), dates)
+        self.assertEqual(Post.objects.filter(group=self.group).count(), 2)
+
+
+class BenchmarkViewsCommandTest(TestCase):
+    def test_benchmark_writes_json_report(self):
+        """Замер наполняет базу и отчитывается по всем страницам."""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'bench.json')
+        call_command('benchmark_views', '--in-place', '--posts', '300',
+                     '--authors', '5', '--groups', '3', '--iterations', '2',
+                     '--warmup', '0', '--output', path, stderr=StringIO())
+        self.assertEqual(Post.objects.filter(
+            author__username__startswith='bench').count(), 302)
+        with open(path, encoding='utf-8') as file:
+            report = json.load(file)
+        names = [result['name'] for result in report['results']]
+        self.assertIn('index:first', names)
+        self.assertIn('profile:after', names)
+        self.assertEqual(names[-3:], ['post_view', 'new_post', 'post_edit'])
+        for result in report['results']:
+            self.assertLessEqual(result['latency_ms']['p50'],
+                                 result['latency_ms']['max'])
+            self.assertGreater(result['queries']['min'], 0)
+
+
+class RenderPostsHtmlCommandTest(TestCase):
+    def test_backfill_renders_empty_html_only(self):
+        """render_posts_html заполняет пустой text_html, а с --all
+        перерисовывает все посты."""
+        user = User.objects.create_user(username='name')
+        Post.objects.bulk_create(
+            Post(text=f'Строка\nпост {i}', author=user) for i in range(5))
+        Post.objects.filter(text__endswith='0').update(text_html='Старый')
+        out = StringIO()
+        call_command('render_posts_html', '--batch-size', '2', stdout=out)
+        self.assertIn('Отрисовано постов: 4', out.getvalue())
+        self.assertEqual(
+            Post.objects.get(text__endswith='1').text_html,
+            'Строка<br>пост 1')
+        self.assertEqual(
+            Post.objects.get(text__endswith='0').text_html, 'Старый')
+        call_command('render_posts_html', '--all', stdout=out)
+        self.assertEqual(
+            Post.objects.get(text__endswith='0').text_html,
+            'Строка<br>пост 0')
+
+    def test_rerender_invalidates_cached_feeds(self):
+        """Перерисованные посты сразу видны в закешированных лентах."""
+        cache.clear()
+        user = User.objects.create_user(username='name')
+        group = Group.objects.create(
+            title='testgroup', slug='test-slug', description='Описание')
+        Post.objects.create(text='Новый текст', author=user, group=group)
+        Post.objects.update(text_html='Старая отрисовка')
+        urls = (reverse('posts:index'),
+                reverse('posts:group_posts', kwargs={'slug': 'test-slug'}),
+                reverse('posts:profile', kwargs={'username': 'name'}))
+        for url in urls:
+            self.assertContains(Client().get(url), 'Старая отрисовка')
+        call_command('render_posts_html', '--all', stdout=StringIO())
+        for url in urls:
+            with self.subTest(url=url):
+                response = Client().get(url)
+                self.assertNotContains(response, 'Старая отрисовка')
+                self.assertContains(response, 'Новый текст')
+
+
+class DeleteInBatchesCommandTest(TestCase):
+    def test_group_is_deleted_with_progress(self):
+        """Команда открепляет посты группы порциями и сообщает ход."""
+        user = User.objects.create_user(username='name')
+        group = Group.objects.create(
+            title='testgroup', slug='test-slug', description='Описание')
+        for i in range(3):
+            Post.objects.create(text=f'Пост {i}', author=user, group=group)
+        out = StringIO()
+        call_command('delete_in_batches', '--group', 'test-slug',
+                     '--batch-size', '2', stdout=out)
+        self.assertIn('Обработано постов: 2 из 3.', out.getvalue())
+        self.assertIn('Удалено: testgroup. Обработано постов: 3.',
+                      out.getvalue())
+        self.assertEqual(Post.objects.filter(group=None).count(), 3)
+
+    def test_unknown_user(self):
+        """Неизвестный пользователь — ошибка команды."""
+        with self.assertRaisesMessage(CommandError, 'Не найден: nobody'):
+            call_command('delete_in_batches', '--user', 'nobody')
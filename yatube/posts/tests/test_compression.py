@@ -0,0 +1,134 @@
+import gzip
+import os
+import shutil
+import tempfile
+
+import brotli
+from django.contrib.auth import get_user_model
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from yatube.storage import VENDOR_ASSETS, check_vendor_assets
+
+from ..models import Post
+
+User = get_user_model()
+
+
+class CompressionMiddlewareTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='name')
+        for i in range(5):
+            Post.objects.create(text=f'Длинный пост {i} ' * 20,
+                                author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def test_html_and_json_are_compressed(self):
+        """Ленты сжимаются тем, что принимает клиент, br — в приоритете."""
+        decompress = {'gzip': gzip.decompress, 'br': brotli.decompress}
+        for url in (reverse('posts:index'), reverse('posts:api_index')):
+            for header, encoding in (('gzip, deflate', 'gzip'),
+                                     ('gzip, br', 'br'),
+                                     ('br;q=0, gzip', 'gzip')):
+                with self.subTest(url=url, header=header):
+                    response = self.client.get(
+                        url, HTTP_ACCEPT_ENCODING=header)
+                    self.assertEqual(response['Content-Encoding'], encoding)
+                    self.assertIn('Accept-Encoding', response['Vary'])
+                    self.assertEqual(int(response['Content-Length']),
+                                     len(response.content))
+                    content = decompress[encoding](response.content)
+                    self.assertIn('Длинный пост 4'.encode(), content)
+
+    def test_uncompressed_without_accept_encoding(self):
+        """Без Accept-Encoding ответ отдаётся как есть."""
+        response = self.client.get(reverse('posts:index'))
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertContains(response, 'Длинный пост 4')
+
+    def test_streaming_export_is_compressed_by_parts(self):
+        """Потоковая выгрузка сжимается без Content-Length."""
+        response = self.client.get(reverse('posts:api_export'),
+                                   HTTP_ACCEPT_ENCODING='gzip')
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertFalse(response.has_header('Content-Length'))
+        lines = gzip.decompress(
+            b''.join(response.streaming_content)).splitlines()
+        self.assertEqual(len(lines), 5)
+
+    def test_conditional_requests_match_weak_etag(self):
+        """Сжатый ответ отдаёт слабый ETag, и он даёт 304."""
+        url = reverse('posts:index')
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertTrue(response['ETag'].startswith('W/"'))
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip',
+                                   HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+
+class CompressedStaticStorageTest(TestCase):
+    storage = 'yatube.storage.CompressedManifestStaticFilesStorage'
+
+    def setUp(self):
+        self.static_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.static_root, ignore_errors=True)
+        # Сторонние файлы в репозитории не хранятся: на их месте
+        # заглушки в отдельном каталоге исходников.
+        self.assets = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.assets, ignore_errors=True)
+        for path in VENDOR_ASSETS:
+            os.makedirs(os.path.join(self.assets, os.path.dirname(path)),
+                        exist_ok=True)
+            with open(os.path.join(self.assets, path), 'w') as file:
+                file.write('.card { margin: 0 auto; }\n' * 100)
+
+    def collectstatic(self):
+        call_command('collectstatic', interactive=False, verbosity=0)
+
+    def assert_compressed_copies(self, name):
+        hashed_name = staticfiles_storage.stored_name(name)
+        self.assertNotEqual(hashed_name, name)
+        path = os.path.join(self.static_root, hashed_name)
+        with open(path, 'rb') as file:
+            original = file.read()
+        for suffix, decompress in (('.gz', gzip.decompress),
+                                   ('.br', brotli.decompress)):
+            with self.subTest(name=name, suffix=suffix):
+                with open(path + suffix, 'rb') as file:
+                    self.assertEqual(decompress(file.read()), original)
+
+    def test_collectstatic_writes_compressed_copies(self):
+        """collectstatic пишет .gz и .br рядом с файлами с хешем, в том
+        числе для bootstrap из STATICFILES_DIRS, а страницы ссылаются на
+        хешированные имена."""
+        with override_settings(STATIC_ROOT=self.static_root,
+                               STATICFILES_DIRS=[self.assets],
+                               STATICFILES_STORAGE=self.storage):
+            self.collectstatic()
+            self.assert_compressed_copies('admin/css/base.css')
+            self.assert_compressed_copies(
+                'bootstrap/dist/css/bootstrap.min.css')
+            cache.clear()
+            response = Client().get(reverse('posts:index'))
+            self.assertContains(response, staticfiles_storage.url(
+                'bootstrap/dist/css/bootstrap.min.css'))
+        self.assertFalse(os.path.exists(
+            os.path.join(self.static_root, 'admin/img/icon-yes.svg.gz')))
+
+    def test_missing_vendor_assets_are_reported(self):
+        """Проверки Django сообщают о стороннем файле, которого нет в
+        исходниках статики."""
+        os.remove(os.path.join(self.assets, VENDOR_ASSETS[0]))
+        with override_settings(STATICFILES_DIRS=[self.assets],
+                               STATICFILES_STORAGE=self.storage):
+            errors = check_vendor_assets(None)
+        self.assertEqual([error.id for error in errors], ['yatube.E001'])
+        self.assertIn(VENDOR_ASSETS[0], errors[0].msg)
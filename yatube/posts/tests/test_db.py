@@ -0,0 +1,103 @@
+import os
+import tempfile
+import threading
+from contextlib import closing
+
+from django.db import OperationalError, connections
+from django.test import SimpleTestCase, override_settings
+
+WAL_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'mmap_size': 1024 * 1024,
+}
+
+
+class SQLiteProfileTest(SimpleTestCase):
+    """Соединения с отдельным файлом базы, как у нескольких процессов."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'db.sqlite3')
+        with self.connect() as db:
+            db.cursor().execute(
+                'CREATE TABLE item (id INTEGER PRIMARY KEY, value TEXT)')
+
+    def connect(self):
+        default = connections['default']
+        db = default.__class__(
+            {**default.settings_dict, 'NAME': self.path}, 'profile')
+        db.ensure_connection()
+        return closing(db)
+
+    def count(self, db):
+        cursor = db.cursor()
+        cursor.execute('SELECT COUNT(*) FROM item')
+        return cursor.fetchone()[0]
+
+    @override_settings(SQLITE_PRAGMAS=WAL_PRAGMAS)
+    def test_pragmas_are_set_on_connect(self):
+        """Каждое новое соединение получает PRAGMA из настроек."""
+        with self.connect() as db:
+            cursor = db.cursor()
+            for name, expected in (('journal_mode', 'wal'),
+                                   ('synchronous', 1),
+                                   ('busy_timeout', 5000),
+                                   ('mmap_size', 1024 * 1024)):
+                with self.subTest(pragma=name):
+                    cursor.execute(f'PRAGMA {name}')
+                    self.assertEqual(cursor.fetchone()[0], expected)
+
+    @override_settings(SQLITE_PRAGMAS=WAL_PRAGMAS)
+    def test_writer_does_not_wait_for_open_reader(self):
+        """В WAL запись фиксируется, пока открыта читающая транзакция,
+        а читатель до конца транзакции видит прежние данные."""
+        with self.connect() as reader, self.connect() as writer:
+            reader.cursor().execute('BEGIN')
+            self.assertEqual(self.count(reader), 0)
+            writer.cursor().execute("INSERT INTO item (value) VALUES ('a')")
+            self.assertEqual(self.count(reader), 0)
+            reader.cursor().execute('COMMIT')
+            self.assertEqual(self.count(reader), 1)
+
+    @override_settings(SQLITE_PRAGMAS={'busy_timeout': 100})
+    def test_default_journal_blocks_writer(self):
+        """Без WAL та же запись упирается в «database is locked»."""
+        with self.connect() as reader, self.connect() as writer:
+            reader.cursor().execute('BEGIN')
+            self.count(reader)
+            with self.assertRaisesMessage(OperationalError,
+                                          'database is locked'):
+                writer.cursor().execute(
+                    "INSERT INTO item (value) VALUES ('a')")
+            reader.cursor().execute('COMMIT')
+
+    @override_settings(SQLITE_PRAGMAS=WAL_PRAGMAS)
+    def test_parallel_readers_and_writers(self):
+        """Потоки-писатели и потоки-читатели работают без ошибок."""
+        errors = []
+
+        def work(write):
+            try:
+                with self.connect() as db:
+                    for number in range(25):
+                        if write:
+                            db.cursor().execute(
+                                'INSERT INTO item (value) VALUES (%s)',
+                                [str(number)])
+                        else:
+                            self.count(db)
+            except Exception as error:
+                errors.append(error)
+
+        threads = [threading.Thread(target=work, args=(number % 2 == 0,))
+                   for number in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        with self.connect() as db:
+            self.assertEqual(self.count(db), 100)
@@ -0,0 +1,152 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Permission
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from tasks.models import QueuedTask
+from tasks.testing import run_on_commit_callbacks
+from users.models import Profile
+
+from ..deletion import delete_group, delete_user
+from ..models import Follow, Group, Post, TimelineEntry
+from ..tasks import delete_user_in_batches
+from ..timeline import fan_out, follow
+
+User = get_user_model()
+
+
+class DeletionTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.other = User.objects.create_user(username='other')
+        cls.group = Group.objects.create(
+            title='testgroup', slug='test-slug', description='Описание')
+        follow(cls.reader, cls.author)
+        follow(cls.author, cls.other)
+        for i in range(5):
+            post = Post.objects.create(text=f'Пост автора {i}',
+                                       author=cls.author, group=cls.group)
+            fan_out(post)
+        Post.objects.create(text='Пост другого', author=cls.other,
+                            group=cls.group)
+
+    def setUp(self):
+        cache.clear()
+
+    def profile(self, user):
+        return Profile.objects.get(user=user)
+
+    def test_delete_user_in_batches(self):
+        """Посты, записи лент и подписки удаляются порциями,
+        счётчики и ленты обновляются."""
+        self.assertContains(Client().get(reverse('posts:index')),
+                            'Пост автора 4')
+        calls = []
+        deleted = delete_user(self.author, batch_size=2,
+                              progress=lambda *args: calls.append(args))
+        self.assertEqual(deleted, 5)
+        self.assertEqual(calls, [(2, 5), (4, 5), (5, 5)])
+        self.assertFalse(User.objects.filter(username='author').exists())
+        self.assertEqual(Post.objects.count(), 1)
+        self.assertFalse(TimelineEntry.objects.exists())
+        self.assertFalse(Follow.objects.exists())
+        self.assertEqual(Group.objects.get().posts_count, 1)
+        self.assertEqual(self.profile(self.reader).following_count, 0)
+        self.assertEqual(self.profile(self.other).followers_count, 0)
+        response = Client().get(reverse('posts:index'))
+        self.assertNotContains(response, 'Пост автора')
+        self.assertContains(response, 'Пост другого')
+
+    def test_delete_group_detaches_posts_in_batches(self):
+        """Посты группы остаются у авторов, без группы."""
+        post = Post.objects.filter(author=self.author).first()
+        url = reverse('posts:api_post_view',
+                      kwargs={'username': 'author', 'post_id': post.pk})
+        self.assertEqual(Client().get(url).json()['group'], 'test-slug')
+        calls = []
+        detached = delete_group(self.group, batch_size=4,
+                                progress=lambda *args: calls.append(args))
+        self.assertEqual(detached, 6)
+        self.assertEqual(calls, [(4, 6), (6, 6)])
+        self.assertFalse(Group.objects.exists())
+        self.assertEqual(Post.objects.filter(group=None).count(), 6)
+        self.assertEqual(self.profile(self.author).posts_count, 5)
+        self.assertIsNone(Client().get(url).json()['group'])
+
+
+class DeletionAdminTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass')
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='testgroup', slug='test-slug', description='Описание')
+        for i in range(3):
+            Post.objects.create(text=f'Пост {i}', author=cls.author,
+                                group=cls.group)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.admin)
+
+    def test_actions_replace_delete_selected(self):
+        """Выбранные в списке пользователи и группы удаляются порциями."""
+        for model, obj in ((Group, self.group), (User, self.author)):
+            with self.subTest(model=model.__name__):
+                url = reverse(f'admin:{model._meta.app_label}_'
+                              f'{model._meta.model_name}_changelist')
+                response = self.client.get(url)
+                self.assertContains(response, 'delete_in_batches')
+                self.assertNotContains(response, 'delete_selected')
+                with run_on_commit_callbacks():
+                    self.client.post(url, {'action': 'delete_in_batches',
+                                           '_selected_action': [obj.pk]})
+                self.assertFalse(model.objects.filter(pk=obj.pk).exists())
+        self.assertFalse(Post.objects.exists())
+
+    @override_settings(TASKS_BACKEND='database')
+    def test_action_is_queued_in_task_table(self):
+        """С очередью в базе удаление ждёт воркера в таблице задач."""
+        self.client.post(reverse('admin:auth_user_changelist'),
+                         {'action': 'delete_in_batches',
+                          '_selected_action': [self.author.pk]})
+        queued = QueuedTask.objects.get()
+        self.assertEqual(queued.name, delete_user_in_batches.name)
+        self.assertTrue(User.objects.filter(pk=self.author.pk).exists())
+        call_command('run_tasks', '--once', stdout=StringIO())
+        self.assertFalse(User.objects.filter(pk=self.author.pk).exists())
+        self.assertFalse(Post.objects.exists())
+
+    def test_delete_page_counts_posts(self):
+        """Страница удаления показывает число постов, а удаление со
+        страницы объекта тоже идёт порциями."""
+        url = reverse('admin:auth_user_delete', args=[self.author.pk])
+        response = self.client.get(url)
+        self.assertContains(response, 'Posts: 3')
+        self.client.post(url, {'post': 'yes'})
+        self.assertFalse(User.objects.filter(pk=self.author.pk).exists())
+        self.assertFalse(Post.objects.exists())
+
+    def test_posts_need_delete_permission(self):
+        """Без права удалять посты автор с постами не удаляется."""
+        staff = User.objects.create_user(
+            username='staff', password='pass', is_staff=True)
+        staff.user_permissions.set(Permission.objects.filter(
+            codename__in=('view_user', 'delete_user')))
+        self.client.force_login(staff)
+        url = reverse('admin:auth_user_delete', args=[self.author.pk])
+        self.assertEqual(self.client.post(url, {'post': 'yes'}).status_code,
+                         403)
+        self.client.post(reverse('admin:auth_user_changelist'),
+                         {'action': 'delete_in_batches',
+                          '_selected_action': [self.author.pk]})
+        self.assertTrue(User.objects.filter(pk=self.author.pk).exists())
+        self.assertEqual(Post.objects.count(), 3)
@@ -1,14 +1,30 @@
 import datetime as dt
+import os
+import shutil
+import tempfile
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import Client, TestCase
 from django.urls import reverse
 from posts.forms import PostForm
+from tasks.testing import run_on_commit_callbacks
 
 from ..models import Group, Post
 
 User = get_user_model()
 
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
 
 class PostFormTests(TestCase):
     @classmethod
@@ -77,3 +93,46 @@ class PostFormTests(TestCase):
                 group=self.group.id
             ).exists()
         )
+
+
+class PostImageTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.media_root = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        cls.user = User.objects.create_user(username='name')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_create_post_with_image(self):
+        """Картинка сохраняется с постом, а миниатюра создаётся
+        при загрузке и показывается в лентах без чтения файла."""
+        with self.settings(MEDIA_ROOT=self.media_root):
+            with run_on_commit_callbacks():
+                self.authorized_client.post(
+                    reverse('posts:new_post'),
+                    {'text': 'С картинкой',
+                     'image': SimpleUploadedFile(
+                         'small.gif', SMALL_GIF, content_type='image/gif')})
+            post = Post.objects.get(text='С картинкой')
+            self.assertEqual(post.image.name, 'posts/small.gif')
+            thumbnails = [name for _, _, names in os.walk(
+                os.path.join(self.media_root, 'cache')) for name in names]
+            self.assertEqual(len(thumbnails), 1)
+            post.image.storage.delete(post.image.name)
+            for url in (reverse('posts:index'),
+                        reverse('posts:post_view',
+                                kwargs={'username': 'name',
+                                        'post_id': post.pk})):
+                with self.subTest(url=url):
+                    response = self.authorized_client.get(url)
+                    self.assertContains(response, '<img class="card-img')
+                    self.assertContains(response, 'width="960"')
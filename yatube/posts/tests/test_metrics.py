@@ -0,0 +1,151 @@
+import os
+import sys
+from importlib import import_module
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.cache import cache
+from django.template import engines
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from yatube.metrics import registry
+from yatube.middleware import QueryBudgetExceeded
+from yatube.template_cache import precompile_templates
+
+from ..models import Post
+
+User = get_user_model()
+
+
+def import_prod_settings(secret_key=None, **variables):
+    """Рабочие настройки, заново прочитанные с этим YATUBE_SECRET_KEY и
+    другими переменными окружения."""
+    environ = dict(os.environ)
+    environ.pop('YATUBE_SECRET_KEY', None)
+    environ.pop('YATUBE_TEMPLATE_PROFILER', None)
+    if secret_key:
+        environ['YATUBE_SECRET_KEY'] = secret_key
+    environ.update(variables)
+    sys.modules.pop('yatube.settings.prod', None)
+    sys.modules.pop('yatube.settings.base', None)
+    with mock.patch.dict(os.environ, environ, clear=True):
+        return import_module('yatube.settings.prod')
+
+
+class MetricsMiddlewareTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='name')
+        cls.admin = User.objects.create_user(username='admin', is_staff=True)
+        Post.objects.create(text='Тестовый текст', author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        registry.reset()
+        self.guest_client = Client()
+
+    def test_server_timing_header(self):
+        """Ответ сообщает число запросов и время базы и шаблонов."""
+        response = self.guest_client.get(reverse('posts:index'))
+        timing = response['Server-Timing']
+        self.assertIn('desc="3 queries"', timing)
+        self.assertIn('tpl;dur=', timing)
+        self.assertIn('total;dur=', timing)
+
+    def test_metrics_are_aggregated_for_staff_only(self):
+        """Гистограммы по именам URL видны только персоналу."""
+        self.guest_client.get(reverse('posts:index'))
+        self.guest_client.get(reverse('posts:index'))
+        response = self.guest_client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 302)
+        admin_client = Client()
+        admin_client.force_login(self.admin)
+        metrics = admin_client.get(reverse('metrics')).json()
+        index = metrics['posts:index']
+        self.assertEqual(index['requests'], 2)
+        # Повторный запрос отдан из кеша страниц одним запросом к базе.
+        self.assertEqual(index['queries']['buckets']['<=3'], 1)
+        self.assertEqual(index['queries']['buckets']['<=1'], 1)
+        self.assertEqual(sum(index['latency_ms']['buckets'].values()), 2)
+
+    @override_settings(QUERY_BUDGETS={'posts:index': 2},
+                       QUERY_BUDGET_RAISE=True)
+    def test_budget_overrun_raises_in_tests(self):
+        with self.assertRaises(QueryBudgetExceeded):
+            self.guest_client.get(reverse('posts:index'))
+
+    @override_settings(QUERY_BUDGETS={'posts:index': 2},
+                       QUERY_BUDGET_RAISE=False)
+    def test_budget_overrun_is_logged(self):
+        with self.assertLogs('yatube.middleware', 'WARNING') as logs:
+            response = self.guest_client.get(reverse('posts:index'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('posts:index: 3 запросов', logs.output[0])
+        self.assertEqual(registry.snapshot()['posts:index']['over_budget'], 1)
+
+
+class TemplateProfilerTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='name')
+        for i in range(3):
+            Post.objects.create(text=f'Тестовый текст {i}', author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+
+    @override_settings(MIDDLEWARE=[
+        *settings.MIDDLEWARE, 'yatube.middleware.TemplateProfilerMiddleware'])
+    def test_report_lists_every_template_and_include(self):
+        """Отчёт считает страницу, родителя из extends и каждый include."""
+        with self.assertLogs('yatube.profiler', 'INFO') as logs:
+            Client().get(reverse('posts:profile', kwargs={'username': 'name'}))
+        report = logs.output[0]
+        self.assertIn('/name/: шаблоны', report)
+        for line in ('posts/profile.html: 1 раз',
+                     'base.html: 1 раз',
+                     'includes/post_card.html: 3 раз',
+                     'includes/user_card.html: 1 раз'):
+            with self.subTest(line=line):
+                self.assertIn(line, report)
+
+    def test_profiler_is_opt_in(self):
+        """Без TemplateProfilerMiddleware в журнал ничего не пишется."""
+        with self.assertRaises(AssertionError):
+            with self.assertLogs('yatube.profiler', 'INFO'):
+                Client().get(reverse('posts:index'))
+
+
+class ProductionSettingsTest(TestCase):
+    def test_templates_are_precompiled_into_cached_loader(self):
+        """В рабочих настройках все шаблоны проекта разбираются при
+        старте и дальше берутся из памяти."""
+        prod = import_prod_settings('secret')
+        with self.settings(TEMPLATES=prod.TEMPLATES):
+            self.assertGreater(precompile_templates(), 0)
+            loader = engines['django'].engine.template_loaders[0]
+            for name in ('base.html', 'posts/index.html',
+                         'includes/post_card.html', 'paginator.html'):
+                with self.subTest(name=name):
+                    self.assertIn(name, loader.get_template_cache)
+
+    def test_template_profiler_can_be_enabled(self):
+        """Профилировщик шаблонов включается переменной окружения и в
+        рабочих настройках."""
+        profiler = 'yatube.middleware.TemplateProfilerMiddleware'
+        self.assertNotIn(profiler, import_prod_settings('secret').MIDDLEWARE)
+        prod = import_prod_settings('secret', YATUBE_TEMPLATE_PROFILER='1')
+        self.assertIn(profiler, prod.MIDDLEWARE)
+        self.assertIn('yatube.profiler', prod.LOGGING['loggers'])
+
+    def test_secret_key_is_required(self):
+        """Без YATUBE_SECRET_KEY рабочие настройки не загружаются."""
+        with self.assertRaisesMessage(ImproperlyConfigured,
+                                      'YATUBE_SECRET_KEY'):
+            import_prod_settings()
+        self.assertEqual(import_prod_settings('secret').SECRET_KEY,
+                         'secret')
@@ -23,6 +23,17 @@ class PostModelTest(TestCase):
         expected_object_name = post.text
         self.assertEqual(str(post), expected_object_name)
 
+    def test_text_html_is_rendered_on_save(self):
+        """HTML текста экранируется и получает переносы при сохранении."""
+        post = Post(text='<b>Жирный</b>\r\nтекст', author=self.user)
+        post.save()
+        self.assertEqual(post.text_html,
+                         '&lt;b&gt;Жирный&lt;/b&gt;<br>текст')
+        post.text = 'Новый\nтекст'
+        post.save(update_fields=['text'])
+        post.refresh_from_db()
+        self.assertEqual(post.text_html, 'Новый<br>текст')
+
 
 class GroupModelTest(TestCase):
     @classmethod
@@ -0,0 +1,167 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connections
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from yatube.middleware import PRIMARY_COOKIE
+from yatube.routers import ReplicaRouter
+
+from ..cache import version_key
+from ..lookups import authors, groups
+from ..management.commands.sync_replica import Command as SyncReplica
+from ..management.commands.sync_replica import copy_database
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+@override_settings(REPLICA_ALIASES=('replica',))
+class ReplicaRoutingTest(TestCase):
+    databases = {'default', 'replica'}
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='name')
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='testgroup', slug='test-slug', description='Описание')
+        cls.post = Post.objects.create(
+            text='Тестовый текст', author=cls.author, group=cls.group)
+
+    def setUp(self):
+        cache.clear()
+        groups.clear()
+        authors.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def get(self, url):
+        """Ответ и число запросов к default и к реплике."""
+        primary = CaptureQueriesContext(connections['default'])
+        replica = CaptureQueriesContext(connections['replica'])
+        with primary, replica:
+            response = self.client.get(url)
+        return response, len(primary), len(replica)
+
+    def test_feeds_read_from_replica(self):
+        """Ленты и пост читаются из реплики и видят данные default."""
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_posts', kwargs={'slug': 'test-slug'}),
+            reverse('posts:profile', kwargs={'username': 'author'}),
+            reverse('posts:post_view', kwargs={'username': 'author',
+                                               'post_id': self.post.pk}),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response, primary, replica = self.get(url)
+                self.assertContains(response, 'Тестовый текст')
+                self.assertGreater(replica, 0)
+                self.assertEqual(primary, 0)
+
+    def test_other_pages_read_from_primary(self):
+        """Страницы вне REPLICA_VIEWS к реплике не обращаются."""
+        _, _, replica = self.get(reverse('posts:search') + '?q=текст')
+        self.assertEqual(replica, 0)
+
+    def test_writes_stick_to_primary(self):
+        """После записи клиент какое-то время читает только из default."""
+        index = reverse('posts:index')
+        for method, url, data in (
+                ('post', reverse('posts:new_post'), {'text': 'Новый пост'}),
+                ('get', reverse('posts:profile_follow',
+                                kwargs={'username': 'author'}), None)):
+            with self.subTest(url=url):
+                self.client.cookies.pop(PRIMARY_COOKIE, None)
+                response = getattr(self.client, method)(url, data)
+                self.assertEqual(
+                    response.cookies[PRIMARY_COOKIE]['max-age'], 10)
+                response, _, replica = self.get(index)
+                self.assertEqual(replica, 0)
+                self.assertContains(response, 'Новый пост')
+
+    def test_reads_without_writes_do_not_stick(self):
+        """Чтение и отклонённая форма cookie не ставят."""
+        for response in (self.client.get(reverse('posts:index')),
+                         self.client.post(reverse('posts:new_post'), {})):
+            with self.subTest(url=response.request['PATH_INFO']):
+                self.assertNotIn(PRIMARY_COOKIE, response.cookies)
+
+    def test_router_writes_and_migrates_primary_only(self):
+        """Запись и миграции — только в default."""
+        router = ReplicaRouter()
+        self.assertEqual(router.db_for_write(Post), 'default')
+        self.assertIsNone(router.db_for_read(Post))
+        self.assertTrue(router.allow_migrate('default', 'posts'))
+        self.assertFalse(router.allow_migrate('replica', 'posts'))
+
+    def make_old(self, feed, key=''):
+        """Версия ленты старше наибольшего отставания реплики."""
+        cache.set(version_key(feed, key), time.time_ns() - 11 * 10 ** 9,
+                  None)
+
+    def test_lagging_replica_does_not_fill_caches(self):
+        """Пока реплика может не знать о правке, прочитанное из неё не
+        кешируется и не получает ETag."""
+        url = reverse('posts:group_posts', kwargs={'slug': 'test-slug'})
+        counts = []
+        for _ in range(2):
+            response, _, replica = self.get(url)
+            counts.append(replica)
+            self.assertNotIn('ETag', response)
+            self.assertNotIn('Last-Modified', response)
+        self.assertEqual(counts[0], counts[1])
+        self.assertNotIn('test-slug', groups.entries)
+
+        self.make_old('group', 'test-slug')
+        response, _, uncached = self.get(url)
+        self.assertIn('ETag', response)
+        self.assertIn('test-slug', groups.entries)
+        _, _, cached = self.get(url)
+        self.assertLess(cached, uncached)
+
+
+class CopyDatabaseTest(TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.path)
+        self.source = os.path.join(self.path, 'db.sqlite3')
+        self.target = os.path.join(self.path, 'db.replica.sqlite3')
+
+    def execute(self, path, sql):
+        connection = sqlite3.connect(path)
+        try:
+            with connection:
+                return connection.execute(sql).fetchall()
+        finally:
+            connection.close()
+
+    def test_replica_lags_until_next_copy(self):
+        """Копия видит правки default только после следующей синхронизации."""
+        self.execute(self.source, 'CREATE TABLE post (text TEXT)')
+        self.execute(self.source, "INSERT INTO post VALUES ('первый')")
+        copy_database(self.source, self.target)
+        self.execute(self.source, "INSERT INTO post VALUES ('второй')")
+        count = 'SELECT COUNT(*) FROM post'
+        self.assertEqual(self.execute(self.target, count), [(1,)])
+        copy_database(self.source, self.target)
+        self.assertEqual(self.execute(self.target, count), [(2,)])
+
+    @override_settings(REPLICA_STICKY_SECONDS=0)
+    def test_slow_copy_is_reported(self):
+        """Копия дольше окна после записи — предупреждение."""
+        self.execute(self.source, 'CREATE TABLE post (text TEXT)')
+        stdout, stderr = StringIO(), StringIO()
+        SyncReplica(stdout=stdout, stderr=stderr).copy(
+            self.source, self.target)
+        self.assertIn('База скопирована', stdout.getvalue())
+        self.assertIn('REPLICA_STICKY_SECONDS', stderr.getvalue())
@@ -1,11 +1,22 @@
 import datetime as dt
+from http import HTTPStatus
+from unittest import mock
 
 from django import forms
 from django.contrib.auth import get_user_model
-from django.test import Client, TestCase
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
 from django.urls import reverse
+from tasks.testing import run_on_commit_callbacks
 
-from ..models import Group, Post
+from ..cache import bump_feed_version
+from ..lookups import authors, groups
+from ..models import Follow, Group, Post, TimelineEntry
+from ..paginator import CursorPaginator, WindowedPaginator
+from ..search import search
+from ..timeline import TimelinePaginator, fan_out
+from ..views import COUNT_POSTS
 
 User = get_user_model()
 
@@ -48,6 +59,7 @@ class PostPagesTests(TestCase):
         }
 
     def setUp(self):
+        cache.clear()
         self.guest_client = Client()
         self.authorized_client = Client()
         self.authorized_client.force_login(PostPagesTests.user)
@@ -82,6 +94,7 @@ class PostPagesTests(TestCase):
         form_fields = {
             'text': forms.fields.CharField,
             'group': forms.fields.ChoiceField,
+            'image': forms.fields.ImageField,
         }
         for value, expected in form_fields.items():
             with self.subTest(value=value):
@@ -140,6 +153,7 @@ class PaginatorViewsTest(TestCase):
         Post.objects.bulk_create(posts)
 
     def setUp(self):
+        cache.clear()
         self.guest_client = Client()
 
     def test_first_page_contains_ten_records(self):
@@ -149,3 +163,692 @@ class PaginatorViewsTest(TestCase):
     def test_second_page_contains_one_records(self):
         response = self.guest_client.get(reverse('posts:index') + '?page=2')
         self.assertEqual(len(response.context.get('page').object_list), 1)
+
+    def test_cursor_pages_follow_each_other(self):
+        """Курсоры ?after= и ?before= листают ленту без пропусков."""
+        response = self.guest_client.get(reverse('posts:index'))
+        first_page = response.context['page']
+        response = self.guest_client.get(
+            reverse('posts:index'), {'after': first_page.next_cursor})
+        second_page = response.context['page']
+        self.assertEqual(len(second_page.object_list), 1)
+        self.assertFalse(second_page.has_next())
+        self.assertEqual(
+            second_page[0].pk,
+            Post.objects.order_by('pub_date', 'id').first().pk)
+        response = self.guest_client.get(
+            reverse('posts:index'), {'before': second_page.previous_cursor})
+        previous_page = response.context['page']
+        self.assertEqual(
+            [post.pk for post in previous_page],
+            [post.pk for post in first_page])
+        self.assertFalse(previous_page.has_previous())
+
+    def test_page_window_is_bounded(self):
+        """Пагинатор показывает края и окно вокруг текущей страницы."""
+        paginator = WindowedPaginator(range(500000), 10)
+        cases = {
+            1: [1, 2, 3, None, 50000],
+            4: [1, 2, 3, 4, 5, 6, None, 50000],
+            25000: [1, None, 24998, 24999, 25000, 25001, 25002, None, 50000],
+            50000: [1, None, 49998, 49999, 50000],
+        }
+        for number, window in cases.items():
+            with self.subTest(number=number):
+                self.assertEqual(paginator.page(number).page_window, window)
+
+    def test_paginator_renders_window_only(self):
+        """Число ссылок пагинатора не растёт вместе с лентой."""
+        Post.objects.bulk_create(
+            Post(text=f'Тестовый текст{i}', author=self.user)
+            for i in range(300))
+        response = self.guest_client.get(
+            reverse('posts:index'), {'page': 15})
+        self.assertEqual(
+            response.content.decode().count('class="page-item'), 11)
+        self.assertContains(response, '&hellip;', count=2)
+
+    def test_broken_cursor_falls_back_to_first_page(self):
+        """Битый курсор открывает первую страницу."""
+        response = self.guest_client.get(
+            reverse('posts:index'), {'after': '!!!'})
+        self.assertEqual(response.context['page'].number, 1)
+        self.assertEqual(len(response.context['page'].object_list), 10)
+
+    @override_settings(PAGINATOR_EXACT_COUNT_LIMIT=5)
+    def test_large_count_is_cached_and_marked_approximate(self):
+        """Большое число постов считается один раз и помечается «~»."""
+        response = self.guest_client.get(reverse('posts:index'))
+        self.assertNotContains(response, '>~2</a>')
+        WindowedPaginator(Post.objects.order_by('-id'), 10).count
+        Post.objects.create(text='Новый пост', author=self.user)
+        paginator = WindowedPaginator(Post.objects.order_by('-id'), 10)
+        with self.assertNumQueries(0):
+            self.assertEqual(paginator.count, 11)
+        self.assertTrue(paginator.count_is_approximate)
+        response = self.guest_client.get(reverse('posts:index'))
+        self.assertContains(response, '>~2</a>')
+        # На последней странице оценка тоже помечена.
+        response = self.guest_client.get(reverse('posts:index') + '?page=2')
+        self.assertContains(response, '<span class="page-link">~2')
+
+    @override_settings(PAGINATOR_EXACT_COUNT_LIMIT=100)
+    def test_small_count_stays_exact(self):
+        """Ниже порога число постов считается заново при каждом запросе."""
+        WindowedPaginator(Post.objects.order_by('-id'), 10).count
+        Post.objects.create(text='Новый пост', author=self.user)
+        paginator = WindowedPaginator(Post.objects.order_by('-id'), 10)
+        self.assertEqual(paginator.count, 12)
+        self.assertFalse(paginator.count_is_approximate)
+
+    @override_settings(PAGINATOR_EXACT_COUNT_LIMIT=5,
+                       PAGINATOR_TABLE_STATS=True)
+    def test_count_is_estimated_from_table_stats(self):
+        """После ANALYZE число постов берётся из статистики таблицы."""
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE posts_post')
+        paginator = WindowedPaginator(Post.objects.order_by('-id'), 10)
+        with self.assertNumQueries(1):
+            self.assertEqual(paginator.count, 11)
+        self.assertTrue(paginator.count_is_approximate)
+        filtered = WindowedPaginator(
+            Post.objects.filter(group=self.group_2).order_by('-id'), 10)
+        self.assertEqual(filtered.count, 11)
+        self.assertFalse(filtered.count_is_approximate)
+
+    def test_cursor_queries_search_index_range(self):
+        """Страница по курсору — поиск диапазона по индексу, а не обход
+        индекса с начала ленты."""
+        paginator = CursorPaginator(Post.feed.all(), COUNT_POSTS)
+        cursor = (dt.datetime.now(), 1)
+        for posts, bound in ((paginator.after(cursor), 'pub_date<?'),
+                             (paginator.before(cursor), 'pub_date>?')):
+            sql, params = posts[:COUNT_POSTS + 1].query.sql_with_params()
+            with connection.cursor() as db_cursor:
+                db_cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+                plan = [row[-1] for row in db_cursor.fetchall()]
+            with self.subTest(bound=bound):
+                self.assertTrue([
+                    step for step in plan
+                    if step.startswith('SEARCH posts_post ')
+                    and f'({bound})' in step])
+                self.assertFalse(
+                    [step for step in plan
+                     if step.startswith('SCAN posts_post')])
+
+
+class FeedQueriesTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="name")
+        cls.group = Group.objects.create(
+            title="testgroup",
+            slug='test-slug',
+            description='Описание')
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def create_authors_posts(self, count):
+        Post.objects.all().delete()
+        User.objects.exclude(username='name').delete()
+        for i in range(count):
+            author = User.objects.create_user(
+                username=f'author{i}', first_name='Имя', last_name='Фамилия')
+            Post.objects.create(
+                text=f'Тестовый текст{i}', author=author, group=self.group)
+
+    def test_feeds_query_count_does_not_depend_on_posts(self):
+        """Ленты выполняют одно и то же число запросов
+        для одного и для десяти постов разных авторов."""
+        urls = {
+            reverse('posts:index'): 3,
+            reverse('posts:group_posts',
+                    kwargs={'slug': self.group.slug}): 3,
+        }
+        for posts_count in (1, 10):
+            self.create_authors_posts(posts_count)
+            for url, queries in urls.items():
+                with self.subTest(url=url, posts_count=posts_count):
+                    with self.assertNumQueries(queries):
+                        response = self.guest_client.get(url)
+                    self.assertEqual(
+                        len(response.context['page']), posts_count)
+
+
+class FeedCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="name")
+        cls.group = Group.objects.create(
+            title="testgroup",
+            slug='test-slug',
+            description='Описание')
+        cls.group_2 = Group.objects.create(
+            title="testgroup2",
+            slug='test-slug2',
+            description='Описание2')
+        cls.post = Post.objects.create(
+            text='Тестовый текст', author=cls.user, group=cls.group)
+        cls.feed_urls = (
+            reverse('posts:index'),
+            reverse('posts:group_posts', kwargs={'slug': cls.group.slug}),
+            reverse('posts:profile', kwargs={'username': cls.user.username}),
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(FeedCacheTest.user)
+
+    def test_repeated_feed_request_served_from_cache(self):
+        """Повторный запрос ленты делает только один запрос к базе —
+        за датой последнего изменения для Last-Modified."""
+        for url in self.feed_urls:
+            with self.subTest(url=url):
+                first = self.guest_client.get(url)
+                with self.assertNumQueries(1):
+                    second = self.guest_client.get(url)
+                self.assertEqual(first.content, second.content)
+
+    def test_new_post_invalidates_feeds(self):
+        """Новый пост сразу виден во всех своих лентах."""
+        for url in self.feed_urls:
+            self.guest_client.get(url)
+        Post.objects.create(
+            text='Свежий пост', author=self.user, group=self.group)
+        for url in self.feed_urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertContains(response, 'Свежий пост')
+
+    def test_edit_moves_post_between_group_feeds(self):
+        """Смена группы при редактировании сбрасывает обе ленты групп."""
+        old_url = reverse('posts:group_posts', kwargs={'slug': 'test-slug'})
+        new_url = reverse('posts:group_posts', kwargs={'slug': 'test-slug2'})
+        self.guest_client.get(old_url)
+        self.guest_client.get(new_url)
+        self.authorized_client.post(
+            reverse('posts:post_edit', kwargs={'username': 'name',
+                                               'post_id': self.post.id}),
+            data={'text': 'Перенесённый пост', 'group': self.group_2.id})
+        self.assertNotContains(
+            self.guest_client.get(old_url), 'Перенесённый пост')
+        self.assertContains(
+            self.guest_client.get(new_url), 'Перенесённый пост')
+
+    def test_rename_invalidates_old_address(self):
+        """После смены slug и имени старые адреса лент отдают 404."""
+        group = Group.objects.create(title='Старая', slug='old-slug')
+        user = User.objects.create_user(username='old-name')
+        old_urls = (
+            reverse('posts:group_posts', kwargs={'slug': 'old-slug'}),
+            reverse('posts:profile', kwargs={'username': 'old-name'}),
+        )
+        for url in old_urls:
+            self.assertEqual(self.guest_client.get(url).status_code,
+                             HTTPStatus.OK)
+        group.slug = 'new-slug'
+        group.save()
+        user.username = 'new-name'
+        user.save()
+        for url in old_urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.guest_client.get(url).status_code,
+                                 HTTPStatus.NOT_FOUND)
+
+    def test_cached_pages_depend_on_user(self):
+        """Гость не получает страницу, закешированную для пользователя."""
+        self.authorized_client.get(reverse('posts:index'))
+        response = self.guest_client.get(reverse('posts:index'))
+        self.assertNotContains(response, 'Пользователь: name')
+
+    def test_edit_invalidates_only_its_fragment(self):
+        """Правка поста перерисовывает только его карточку."""
+        other = Post.objects.create(
+            text='Другой пост', author=self.user, group=self.group)
+        self.guest_client.get(reverse('posts:index'))
+        # update() не меняет updated_at: карточка остаётся прежней.
+        Post.objects.filter(pk=other.pk).update(text='Незаметная правка')
+        self.authorized_client.post(
+            reverse('posts:post_edit', kwargs={'username': 'name',
+                                               'post_id': self.post.id}),
+            data={'text': 'Исправленный пост', 'group': self.group.id})
+        response = self.guest_client.get(reverse('posts:index'))
+        self.assertContains(response, 'Исправленный пост')
+        self.assertContains(response, 'Другой пост')
+        self.assertNotContains(response, 'Незаметная правка')
+
+    def test_feeds_output_stored_html(self):
+        """Ленты выводят сохранённый HTML, а без него — linebreaksbr."""
+        Post.objects.filter(pk=self.post.pk).update(
+            text_html='Готовый <em>HTML</em>')
+        Post.objects.create(text='Без\nHTML', author=self.user)
+        Post.objects.filter(text='Без\nHTML').update(text_html='')
+        for url in self.feed_urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertContains(response, 'Готовый <em>HTML</em>')
+                if url != self.feed_urls[1]:
+                    self.assertContains(response, 'Без<br>HTML')
+
+    def test_fragments_are_read_in_one_cache_call(self):
+        """Карточки страницы читаются из кеша одним get_many."""
+        for i in range(5):
+            Post.objects.create(text=f'Пост {i}', author=self.user)
+        self.guest_client.get(reverse('posts:index'))
+        bump_feed_version('index')
+        patch_get = mock.patch.object(cache, 'get_many',
+                                      wraps=cache.get_many)
+        patch_set = mock.patch.object(cache, 'set_many')
+        with patch_get as get_many, patch_set as set_many:
+            response = self.guest_client.get(reverse('posts:index'))
+        get_many.assert_called_once()
+        self.assertEqual(len(get_many.call_args[0][0]), 6)
+        set_many.assert_not_called()
+        self.assertContains(response, 'Пост 4')
+
+
+class PostsCounterTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="name")
+        cls.group = Group.objects.create(
+            title="testgroup",
+            slug='test-slug',
+            description='Описание')
+        cls.group_2 = Group.objects.create(
+            title="testgroup2",
+            slug='test-slug2',
+            description='Описание2')
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(PostsCounterTest.user)
+
+    def assert_counts(self, author, group, group_2):
+        self.user.profile.refresh_from_db()
+        self.group.refresh_from_db()
+        self.group_2.refresh_from_db()
+        self.assertEqual(self.user.profile.posts_count, author)
+        self.assertEqual(self.group.posts_count, group)
+        self.assertEqual(self.group_2.posts_count, group_2)
+
+    def test_counters_follow_create_edit_and_delete(self):
+        """Счётчики постов меняются при создании, переносе и удалении."""
+        self.authorized_client.post(
+            reverse('posts:new_post'),
+            data={'text': 'Тестовый текст', 'group': self.group.id})
+        self.assert_counts(1, 1, 0)
+        post = Post.objects.get()
+        self.authorized_client.post(
+            reverse('posts:post_edit', kwargs={'username': 'name',
+                                               'post_id': post.id}),
+            data={'text': 'Тестовый текст', 'group': self.group_2.id})
+        self.assert_counts(1, 0, 1)
+        Post.objects.get().delete()
+        self.assert_counts(0, 0, 0)
+
+    def test_move_outside_views_is_counted(self):
+        """Перенос поста в админке или из консоли тоже меняет счётчики."""
+        post = Post.objects.create(text='Текст', author=self.user,
+                                   group=self.group)
+        post.group = self.group_2
+        post.save()
+        self.assert_counts(1, 0, 1)
+        post.group = None
+        post.save(update_fields=['group'])
+        self.assert_counts(1, 0, 0)
+        post.text = 'Правка без переноса'
+        post.save(update_fields=['text'])
+        self.assert_counts(1, 0, 0)
+
+    def test_profile_reads_counter_instead_of_count(self):
+        """Профиль берёт число постов из счётчика, без COUNT(*)."""
+        Post.objects.create(text='Тестовый текст', author=self.user)
+        with self.assertNumQueries(3):
+            response = Client().get(
+                reverse('posts:profile', kwargs={'username': 'name'}))
+        self.assertEqual(response.context['page'].paginator.count, 1)
+        self.assertContains(response, 'Записей: 1')
+
+
+class LookupCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='name')
+        cls.group = Group.objects.create(
+            title='testgroup', slug='test-slug', description='Описание')
+        cls.post = Post.objects.create(
+            text='Тестовый текст', author=cls.user, group=cls.group)
+
+    def setUp(self):
+        cache.clear()
+        groups.clear()
+        authors.clear()
+
+    def test_warm_lookup_drops_a_query(self):
+        """Группа и автор берутся из кеша, а не из базы."""
+        urls = (
+            reverse('posts:group_posts', kwargs={'slug': 'test-slug'}),
+            reverse('posts:profile', kwargs={'username': 'name'}),
+            reverse('posts:post_view', kwargs={'username': 'name',
+                                               'post_id': self.post.pk}),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                Client().get(url)
+                # Другой адрес страницы — мимо кеша страниц ленты.
+                with self.assertNumQueries(2):
+                    response = Client().get(url + '?page=1')
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_changes_invalidate_lookups(self):
+        """Правка группы, новый пост и удаление автора видны сразу."""
+        group_url = reverse('posts:group_posts', kwargs={'slug': 'test-slug'})
+        profile_url = reverse('posts:profile', kwargs={'username': 'name'})
+        Client().get(group_url)
+        Client().get(profile_url)
+        self.group.title = 'Новое название'
+        self.group.save()
+        self.assertContains(Client().get(group_url), 'Новое название')
+        Post.objects.create(text='Второй пост', author=self.user)
+        self.assertContains(Client().get(profile_url), 'Записей: 2')
+        self.user.delete()
+        self.assertEqual(Client().get(profile_url).status_code,
+                         HTTPStatus.NOT_FOUND)
+
+    @override_settings(LOOKUP_CACHE_SHARED=True)
+    def test_shared_cache_serves_other_processes(self):
+        """Промах в памяти процесса находится в общем кеше."""
+        groups.get('test-slug')
+        groups.clear()
+        with self.assertNumQueries(0):
+            group = groups.get('test-slug')
+        self.assertEqual(group.pk, self.group.pk)
+
+    @override_settings(LOOKUP_CACHE_SHARED=True)
+    def test_rename_forgets_old_key(self):
+        """Старые slug и имя не находятся ни в памяти, ни в общем кеше."""
+        groups.get('test-slug')
+        authors.get('name')
+        # Объекты класса меняются другими тестами, поэтому читаются заново.
+        for obj, field in ((Group.objects.get(slug='test-slug'), 'slug'),
+                           (User.objects.get(username='name'), 'username')):
+            setattr(obj, field, 'renamed')
+            obj.save()
+        for lookup, key in ((groups, 'test-slug'), (authors, 'name')):
+            with self.subTest(lookup=lookup.name):
+                self.assertNotIn(key, lookup.entries)
+                self.assertIsNone(cache.get(lookup.shared_key(key)))
+                self.assertIsNone(lookup.get(key))
+
+    @override_settings(LOOKUP_CACHE_SIZE=1)
+    def test_least_recently_used_entry_is_evicted(self):
+        """Сверх LOOKUP_CACHE_SIZE вытесняется давно не читанная запись."""
+        Group.objects.create(title='other', slug='other', description='')
+        groups.get('test-slug')
+        groups.get('other')
+        self.assertEqual(list(groups.entries), ['other'])
+
+    def test_missing_rows_are_not_cached(self):
+        """Созданная после промаха группа находится сразу."""
+        self.assertIsNone(groups.get('later'))
+        Group.objects.create(title='later', slug='later', description='')
+        self.assertEqual(groups.get('later').title, 'later')
+
+
+class SearchViewTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="name")
+        cls.group = Group.objects.create(
+            title="Садоводы",
+            slug='test-slug',
+            description='Всё о яблонях')
+        cls.post = Post.objects.create(
+            text='Яблоки в этом году уродились', author=cls.user)
+        cls.other_post = Post.objects.create(
+            text='Про погоду', author=cls.user, group=cls.group)
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def search(self, query):
+        return self.guest_client.get(reverse('posts:search'), {'q': query})
+
+    def test_search_finds_posts_and_groups(self):
+        """Поиск находит посты и группы по началу слова."""
+        response = self.search('ябло')
+        self.assertEqual(list(response.context['page']), [self.post])
+        self.assertEqual(list(response.context['groups']), [self.group])
+
+    def test_search_follows_edits(self):
+        """Индекс поиска обновляется при изменении поста."""
+        self.post.text = 'Груши'
+        self.post.save()
+        self.assertEqual(len(self.search('яблоки').context['page']), 0)
+        self.assertEqual(list(self.search('груши').context['page']),
+                         [self.post])
+
+    def test_search_ignores_fts_syntax(self):
+        """Операторы FTS5 в строке поиска не ломают запрос."""
+        response = self.search('"ябло* OR NEAR(')
+        self.assertEqual(response.status_code, 200)
+
+    def test_search_keeps_query_in_page_links(self):
+        """Ссылки пагинации сохраняют строку поиска."""
+        Post.objects.bulk_create(
+            Post(text=f'Яблоко {i}', author=self.user) for i in range(12))
+        response = self.search('яблоко')
+        self.assertContains(response, 'href="?q=%D1%8F%D0%B1%D0%BB%D0%BE'
+                                      '%D0%BA%D0%BE&amp;page=2"')
+
+    def test_search_uses_fulltext_index(self):
+        """Поиск идёт по индексу FTS5 и не сканирует таблицу постов,
+        поэтому не замедляется с ростом числа постов."""
+        posts = search(Post.feed.all(), 'яблоки')[:COUNT_POSTS]
+        sql, params = posts.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            plan = [row[-1] for row in cursor.fetchall()]
+        self.assertIn('VIRTUAL TABLE INDEX', plan[0])
+        self.assertFalse(
+            [step for step in plan if step.startswith('SCAN posts_post ')])
+
+    def test_admin_search_uses_fulltext_index(self):
+        """Поиск в админке находит посты и группы."""
+        admin = User.objects.create_superuser(
+            username='admin', email='admin@mail.com', password='Pass12345')
+        self.guest_client.force_login(admin)
+        for url, expected in (('/admin/posts/post/', self.post),
+                              ('/admin/posts/group/', self.group)):
+            with self.subTest(url=url):
+                response = self.guest_client.get(url, {'q': 'ябло'})
+                self.assertEqual(
+                    list(response.context['cl'].result_list), [expected])
+
+
+class ConditionalGetTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="name")
+        cls.group = Group.objects.create(
+            title="testgroup",
+            slug='test-slug',
+            description='Описание')
+        cls.post = Post.objects.create(
+            text='Тестовый текст', author=cls.user, group=cls.group)
+        cls.urls = (
+            reverse('posts:index'),
+            reverse('posts:group_posts', kwargs={'slug': cls.group.slug}),
+            reverse('posts:profile', kwargs={'username': cls.user.username}),
+            reverse('posts:post_view', kwargs={'username': 'name',
+                                               'post_id': cls.post.id}),
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_unchanged_pages_return_not_modified(self):
+        """Повтор запроса с ETag или Last-Modified получает 304
+        одним запросом к базе, без отрисовки шаблона."""
+        for url in self.urls:
+            response = self.guest_client.get(url)
+            for header, value in (
+                    ('HTTP_IF_NONE_MATCH', response['ETag']),
+                    ('HTTP_IF_MODIFIED_SINCE', response['Last-Modified'])):
+                with self.subTest(url=url, header=header):
+                    with self.assertNumQueries(1):
+                        repeated = self.guest_client.get(
+                            url, **{header: value})
+                    self.assertEqual(repeated.status_code,
+                                     HTTPStatus.NOT_MODIFIED)
+
+    def test_edit_changes_etag(self):
+        """После правки поста старый ETag больше не подходит."""
+        etags = {url: self.guest_client.get(url)['ETag'] for url in self.urls}
+        self.post.text = 'Новый текст'
+        self.post.save()
+        for url, etag in etags.items():
+            with self.subTest(url=url):
+                response = self.guest_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                self.assertContains(response, 'Новый текст')
+
+    def test_edit_updates_updated_at(self):
+        """Правка поста обновляет updated_at, дата публикации остаётся."""
+        pub_date = self.post.pub_date
+        updated_at = self.post.updated_at
+        self.post.text = 'Новый текст'
+        self.post.save()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.pub_date, pub_date)
+        self.assertGreater(self.post.updated_at, updated_at)
+
+
+class FollowViewsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username="author")
+        cls.follower = User.objects.create_user(username="follower")
+        cls.stranger = User.objects.create_user(username="stranger")
+
+    def setUp(self):
+        cache.clear()
+        self.author_client = Client()
+        self.author_client.force_login(FollowViewsTest.author)
+        self.follower_client = Client()
+        self.follower_client.force_login(FollowViewsTest.follower)
+        self.stranger_client = Client()
+        self.stranger_client.force_login(FollowViewsTest.stranger)
+
+    def follow(self):
+        self.follower_client.get(reverse(
+            'posts:profile_follow', kwargs={'username': 'author'}))
+
+    def publish(self, text):
+        # Раскладка по лентам ставится в очередь после фиксации.
+        with run_on_commit_callbacks():
+            self.author_client.post(reverse('posts:new_post'),
+                                    data={'text': text})
+
+    def feed(self, client, **params):
+        return client.get(reverse('posts:follow_index'), params)
+
+    def test_follow_updates_counters(self):
+        """Подписка и отписка меняют счётчики в карточке автора."""
+        self.follow()
+        self.follow()
+        self.assertEqual(Follow.objects.count(), 1)
+        response = self.follower_client.get(
+            reverse('posts:profile', kwargs={'username': 'author'}))
+        self.assertContains(response, 'Подписчиков: 1')
+        self.assertContains(response, 'Отписаться')
+        self.follower_client.get(reverse(
+            'posts:profile_unfollow', kwargs={'username': 'author'}))
+        self.assertFalse(Follow.objects.exists())
+        self.author.profile.refresh_from_db()
+        self.assertEqual(self.author.profile.followers_count, 0)
+
+    def test_new_post_is_pushed_to_followers(self):
+        """Новый пост попадает только в ленты подписчиков."""
+        self.follow()
+        self.publish('Пост для подписчиков')
+        post = Post.objects.get()
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.follower, post=post).exists())
+        self.assertEqual(list(self.feed(self.follower_client)
+                              .context['page']), [post])
+        self.assertEqual(len(self.feed(self.stranger_client)
+                             .context['page']), 0)
+
+    def test_follow_backfills_and_unfollow_clears_timeline(self):
+        """Подписка переносит старые посты в ленту, отписка убирает их."""
+        self.publish('Старый пост')
+        self.follow()
+        self.assertEqual(len(self.feed(self.follower_client)
+                             .context['page']), 1)
+        self.follower_client.get(reverse(
+            'posts:profile_unfollow', kwargs={'username': 'author'}))
+        self.assertFalse(TimelineEntry.objects.exists())
+
+    @override_settings(FOLLOW_FANOUT_LIMIT=1)
+    def test_popular_author_is_merged_on_read(self):
+        """Посты популярного автора не раскладываются по лентам,
+        а подмешиваются при чтении с сохранением порядка."""
+        other = User.objects.create_user(username="other")
+        Follow.objects.create(user=self.follower, author=other)
+        self.follow()
+        for i in range(6):
+            self.publish(f'Популярный пост {i}')
+            fan_out(Post.objects.create(text=f'Обычный пост {i}',
+                                        author=other))
+        self.assertFalse(TimelineEntry.objects.filter(
+            author=self.author).exists())
+        expected = list(Post.objects.order_by('-pub_date', '-id'))
+        first = self.feed(self.follower_client).context['page']
+        second = self.feed(self.follower_client,
+                           after=first.next_cursor).context['page']
+        self.assertEqual(list(first) + list(second), expected)
+        self.assertFalse(second.has_next())
+
+    @override_settings(FOLLOW_FANOUT_LIMIT=2)
+    def test_posts_return_to_timelines_below_fanout_limit(self):
+        """Посты, опубликованные, пока автор был популярным, остаются
+        в лентах после отписки, опустившей его ниже порога."""
+        self.follow()
+        self.stranger_client.get(reverse(
+            'posts:profile_follow', kwargs={'username': 'author'}))
+        self.publish('Популярный пост')
+        self.assertFalse(TimelineEntry.objects.exists())
+        self.stranger_client.get(reverse(
+            'posts:profile_unfollow', kwargs={'username': 'author'}))
+        self.assertEqual(
+            [post.text for post in self.feed(self.follower_client)
+             .context['page']], ['Популярный пост'])
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.follower).exists())
+
+    def test_timeline_is_read_by_index(self):
+        """Лента подписок читается по индексу без сортировки."""
+        paginator = TimelinePaginator(self.follower, COUNT_POSTS)
+        entries = paginator.object_list[:COUNT_POSTS]
+        sql, params = entries.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            plan = ' '.join(row[-1] for row in cursor.fetchall())
+        self.assertIn('posts_timeline_feed_idx', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
@@ -0,0 +1,26 @@
+import logging
+
+from sorl.thumbnail import get_thumbnail
+
+logger = logging.getLogger(__name__)
+
+# Миниатюра картинки в карточке поста. Шаблоны получают её только через
+# card_thumbnail, поэтому заранее созданная миниатюра всегда совпадает
+# с той, что ищет лента.
+CARD_GEOMETRY = '960x339'
+CARD_OPTIONS = {'crop': 'center', 'upscale': True}
+
+
+def card_thumbnail(image):
+    """Миниатюра для карточки или None, если картинки нет.
+
+    Когда миниатюра уже создана, её адрес и размеры берутся из
+    хранилища метаданных sorl-thumbnail без обращения к Pillow и диску.
+    """
+    if not image:
+        return None
+    try:
+        return get_thumbnail(image, CARD_GEOMETRY, **CARD_OPTIONS)
+    except Exception:
+        logger.exception('Не удалось получить миниатюру %s', image.name)
+        return None
@@ -0,0 +1,140 @@
+from django.conf import settings
+from django.db.models import F
+from users.models import Profile
+
+from .cache import bump_feed_version
+from .models import FEED_FIELDS, Follow, Post, TimelineEntry
+from .paginator import CursorPaginator
+
+
+def is_popular(author_id):
+    """У популярных авторов лента подписчиков собирается при чтении."""
+    return Profile.objects.filter(
+        user_id=author_id,
+        followers_count__gte=settings.FOLLOW_FANOUT_LIMIT).exists()
+
+
+def push_to_timelines(posts, follower_ids):
+    """Пакетно добавляет посты в ленты подписчиков."""
+    entries = (
+        TimelineEntry(user_id=user_id, post_id=post.pk,
+                      author_id=post.author_id, pub_date=post.pub_date)
+        for user_id in follower_ids for post in posts
+    )
+    TimelineEntry.objects.bulk_create(
+        entries, batch_size=settings.FOLLOW_FANOUT_BATCH_SIZE,
+        ignore_conflicts=True)
+
+
+def fan_out(post):
+    """Раскладывает новый пост по лентам подписчиков автора."""
+    if is_popular(post.author_id):
+        return
+    follower_ids = Follow.objects.filter(
+        author_id=post.author_id).values_list('user_id', flat=True)
+    push_to_timelines([post], follower_ids.iterator())
+
+
+def refill_timelines(author_id):
+    """Кладёт свежие посты автора в ленты всех его подписчиков.
+
+    Нужно после вставки постов в обход fan_out, например импортом.
+    """
+    if is_popular(author_id):
+        return
+    recent = Post.objects.filter(author_id=author_id).order_by(
+        '-pub_date')[:settings.FOLLOW_BACKFILL]
+    follower_ids = Follow.objects.filter(
+        author_id=author_id).values_list('user_id', flat=True)
+    push_to_timelines(list(recent), follower_ids.iterator())
+
+
+def follow(user, author):
+    """Подписывает user на author и переносит в ленту свежие посты."""
+    _, created = Follow.objects.get_or_create(user=user, author=author)
+    if not created:
+        return
+    Profile.objects.filter(user=author).update(
+        followers_count=F('followers_count') + 1)
+    Profile.objects.filter(user=user).update(
+        following_count=F('following_count') + 1)
+    if not is_popular(author.pk):
+        recent = Post.objects.filter(author=author).order_by(
+            '-pub_date')[:settings.FOLLOW_BACKFILL]
+        push_to_timelines(list(recent), [user.pk])
+    bump_feed_version('profile', author.username)
+    bump_feed_version('profile', user.username)
+
+
+def unfollow(user, author):
+    deleted, _ = Follow.objects.filter(user=user, author=author).delete()
+    if not deleted:
+        return
+    TimelineEntry.objects.filter(user=user, author=author).delete()
+    Profile.objects.filter(user=author, followers_count__gt=0).update(
+        followers_count=F('followers_count') - 1)
+    Profile.objects.filter(user=user, following_count__gt=0).update(
+        following_count=F('following_count') - 1)
+    refill_no_longer_popular([author.pk])
+    bump_feed_version('profile', author.username)
+    bump_feed_version('profile', user.username)
+
+
+def refill_no_longer_popular(author_ids):
+    """Раскладывает посты авторов, только что ставших непопулярными.
+
+    Пока автор был популярным, его посты подмешивались в ленты при
+    чтении. После отписки, опустившей число подписчиков ниже
+    FOLLOW_FANOUT_LIMIT, подмешивание прекращается, и без этого посты
+    того времени пропали бы из лент.
+    """
+    crossed = Profile.objects.filter(
+        user_id__in=author_ids,
+        followers_count=settings.FOLLOW_FANOUT_LIMIT - 1,
+    ).values_list('user_id', flat=True)
+    for author_id in crossed:
+        refill_timelines(author_id)
+
+
+class TimelinePaginator(CursorPaginator):
+    """Лента подписок: готовые записи плюс посты популярных авторов.
+
+    Записи ленты читаются по индексу (user, pub_date, post), посты
+    популярных авторов — по индексу (author, pub_date); обе выборки
+    сливаются по ключу курсора. Общее число постов неизвестно, поэтому
+    страницы ленты не нумеруются.
+    """
+
+    id_field = 'post_id'
+    numbered = False
+
+    def __init__(self, user, per_page):
+        entries = TimelineEntry.objects.filter(user=user).select_related(
+            'post__author', 'post__group').only(
+            'pub_date', 'post', *(f'post__{field}' for field in FEED_FIELDS))
+        super().__init__(entries, per_page)
+        popular_ids = list(Follow.objects.filter(
+            user=user,
+            author__profile__followers_count__gte=(
+                settings.FOLLOW_FANOUT_LIMIT),
+        ).values_list('author_id', flat=True))
+        self.popular = None
+        if popular_ids:
+            self.popular = CursorPaginator(
+                Post.feed.filter(author_id__in=popular_ids), per_page)
+
+    def fetch(self, after=None, before=None):
+        posts = [entry.post
+                 for entry in super().fetch(after=after, before=before)]
+        if self.popular is None:
+            return posts
+        # Старые записи автора могли попасть в ленты до того, как он
+        # стал популярным, поэтому дубли отбрасываются.
+        seen = {post.pk for post in posts}
+        posts.extend(post
+                     for post in self.popular.fetch(after=after,
+                                                    before=before)
+                     if post.pk not in seen)
+        posts.sort(key=lambda post: (post.pub_date, post.pk),
+                   reverse=before is None)
+        return posts[:self.per_page + 1]
@@ -1,6 +1,6 @@
 from django.urls import path
 
-from . import views
+from . import api, views
 
 app_name = 'posts'
 
@@ -8,7 +8,19 @@ urlpatterns = [
     path("", views.index, name="index"),
     path("group/<slug:slug>/", views.group_posts, name="group_posts"),
     path("new/", views.new_post, name="new_post"),
+    path("search/", views.search, name="search"),
+    path("follow/", views.follow_index, name="follow_index"),
+    path("api/posts/", api.index, name="api_index"),
+    path("api/posts/export/", api.export, name="api_export"),
+    path("api/group/<slug:slug>/", api.group_posts, name="api_group_posts"),
+    path("api/profile/<str:username>/", api.profile, name="api_profile"),
+    path("api/profile/<str:username>/<int:post_id>/", api.post_view,
+         name="api_post_view"),
     path('<str:username>/', views.profile, name='profile'),
+    path('<str:username>/follow/', views.profile_follow,
+         name='profile_follow'),
+    path('<str:username>/unfollow/', views.profile_unfollow,
+         name='profile_unfollow'),
     path('<str:username>/<int:post_id>/', views.post_view, name='post_view'),
     path('<str:username>/<int:post_id>/edit/', views.post_edit,
          name='post_edit'),
@@ -1,72 +1,140 @@
-from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
 from django.shortcuts import get_object_or_404, redirect, render
 
+from .cache import cache_feed
+from .conditional import conditional_feed, conditional_post
 from .forms import PostForm
-from .models import Group, Post
+from .lookups import get_author_or_404, get_group_or_404
+from .models import Follow, Group, Post
+from .paginator import CursorPaginator, WindowedPaginator
+from .search import search as search_in
+from .tasks import fan_out_post
+from .timeline import TimelinePaginator, follow, unfollow
 
 COUNT_POSTS = 10
-User = get_user_model()
 
 
+def get_page(request, posts, count=None):
+    paginator = CursorPaginator(posts, COUNT_POSTS, count=count)
+    return paginator.get_page_from_request(request.GET)
+
+
+def posts_count(user):
+    """Число постов автора из счётчика профиля."""
+    try:
+        return user.profile.posts_count
+    except ObjectDoesNotExist:
+        return None
+
+
+def is_following(user, author):
+    return user.is_authenticated and Follow.objects.filter(
+        user=user, author=author).exists()
+
+
+@conditional_feed('index')
+@cache_feed('index')
 def index(request):
-    posts = Post.objects.all()
-    paginator = Paginator(posts, COUNT_POSTS)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    page = get_page(request, Post.feed.all())
     return render(request, 'posts/index.html', {'page': page})
 
 
+@conditional_feed('group', 'slug')
+@cache_feed('group', 'slug')
 def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.all()
-    paginator = Paginator(posts, COUNT_POSTS)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    group = get_group_or_404(slug)
+    page = get_page(request, Post.feed.filter(group=group),
+                    count=group.posts_count)
     return render(request, "group.html", {"group": group, "page": page})
 
 
+def search(request):
+    query = request.GET.get('q', '').strip()
+    groups = search_in(Group.objects.all(), query)[:COUNT_POSTS]
+    # Результаты упорядочены по релевантности, курсор по дате
+    # к ним неприменим, поэтому страницы выбираются по номеру.
+    paginator = WindowedPaginator(search_in(Post.feed.all(), query),
+                                  COUNT_POSTS)
+    page = paginator.get_page(request.GET.get('page'))
+    return render(
+        request, 'posts/search.html',
+        {'query': query, 'groups': groups, 'page': page})
+
+
 @login_required
 def new_post(request):
-    form = PostForm(request.POST or None)
+    form = PostForm(request.POST or None, files=request.FILES or None)
     if form.is_valid():
         comment = form.save(commit=False)
         comment.author = request.user
         comment.save()
+        fan_out_post.delay(comment.pk)
         return redirect("posts:index")
     return render(
         request, "posts/new_post.html",
         {"form": form, "is_new": True})
 
 
+@conditional_feed('profile', 'username')
+@cache_feed('profile', 'username')
 def profile(request, username):
-    user_profile = get_object_or_404(User, username=username)
-    paginator = Paginator(user_profile.posts.all(), COUNT_POSTS)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    user_profile = get_author_or_404(username)
+    page = get_page(request, Post.feed.filter(author=user_profile),
+                    count=posts_count(user_profile))
     return render(
         request, 'posts/profile.html',
-        {'page': page, 'user_profile': user_profile})
+        {'page': page, 'user_profile': user_profile,
+         'following': is_following(request.user, user_profile)})
 
 
+@conditional_post
 def post_view(request, username, post_id):
-    post = get_object_or_404(Post, id=post_id, author__username=username)
-    user_profile = post.author
+    user_profile = get_author_or_404(username)
+    post = get_object_or_404(Post.feed, id=post_id, author=user_profile)
     return render(
         request, 'posts/post.html',
-        {'post': post, 'user_profile': user_profile})
+        {'post': post, 'user_profile': user_profile,
+         'following': is_following(request.user, user_profile)})
 
 
 @login_required
 def post_edit(request, username, post_id):
-    post = get_object_or_404(Post, id=post_id, author__username=username)
+    post = get_object_or_404(
+        Post.feed, id=post_id, author=get_author_or_404(username))
     if request.user != post.author:
         return redirect('posts:post_view', username, post_id)
-    form = PostForm(request.POST or None, instance=post)
+    form = PostForm(request.POST or None, files=request.FILES or None,
+                    instance=post)
     if form.is_valid():
-        form.save()
+        # Перенос в другую группу меняет счётчики групп в сигнале
+        # сохранения — вместе с постом или никак.
+        with transaction.atomic():
+            form.save()
         return redirect('posts:post_view', username, post_id)
     return render(
         request, 'posts/new_post.html',
         {"form": form, "post": post, "is_new": False})
+
+
+@login_required
+def follow_index(request):
+    paginator = TimelinePaginator(request.user, COUNT_POSTS)
+    page = paginator.get_page_from_request(request.GET)
+    return render(request, 'posts/follow.html', {'page': page})
+
+
+@login_required
+def profile_follow(request, username):
+    author = get_author_or_404(username)
+    if author != request.user:
+        follow(request.user, author)
+    return redirect('posts:profile', username)
+
+
+@login_required
+def profile_unfollow(request, username):
+    author = get_author_or_404(username)
+    unfollow(request.user, author)
+    return redirect('posts:profile', username)
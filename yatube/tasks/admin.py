@@ -0,0 +1,16 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from .models import QueuedTask
+
+
+@admin.register(QueuedTask)
+class QueuedTaskAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'name', 'attempt', 'run_at', 'failed')
+    list_filter = ('failed', 'name')
+    actions = ['retry']
+
+    def retry(self, request, queryset):
+        queryset.update(failed=False, attempt=1, run_at=timezone.now(),
+                        locked_until=None)
+    retry.short_description = 'Выполнить заново'
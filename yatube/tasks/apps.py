@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+
+
+class TasksConfig(AppConfig):
+    name = 'tasks'
+
+    def ready(self):
+        from yatube.metrics import registry
+
+        from .metrics import stored_metrics
+        registry.add_task_source(stored_metrics)
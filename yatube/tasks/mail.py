@@ -0,0 +1,47 @@
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+
+from .queue import task
+
+
+def message_data(message):
+    return {
+        'subject': message.subject,
+        'body': message.body,
+        'from_email': message.from_email,
+        'to': message.to,
+        'cc': message.cc,
+        'bcc': message.bcc,
+        'reply_to': message.reply_to,
+        'headers': message.extra_headers,
+        'alternatives': getattr(message, 'alternatives', []),
+    }
+
+
+@task
+def send_email(data):
+    connection = get_connection(settings.TASKS_EMAIL_BACKEND)
+    EmailMultiAlternatives(connection=connection, **data).send()
+
+
+class QueuedEmailBackend(BaseEmailBackend):
+    """Отправляет письма фоновой задачей через TASKS_EMAIL_BACKEND.
+
+    Запрос, отправивший письмо, например сброс пароля, не ждёт
+    почтового сервера. Письма с вложениями не проходят через JSON и
+    отправляются сразу.
+    """
+
+    def send_messages(self, email_messages):
+        direct = []
+        for message in email_messages:
+            if message.attachments:
+                direct.append(message)
+            else:
+                send_email.delay(message_data(message))
+        if direct:
+            get_connection(settings.TASKS_EMAIL_BACKEND,
+                           fail_silently=self.fail_silently).send_messages(
+                direct)
+        return len(email_messages)
@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from tasks.queue import run_database_tasks
+
+
+class Command(BaseCommand):
+    help = ('Выполняет задачи из таблицы очереди (TASKS_BACKEND = '
+            '"database"). Процессов можно запустить несколько.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выполнить готовые задачи и выйти.')
+        parser.add_argument(
+            '--interval', type=float, default=1.0,
+            help='Секунд между проверками пустой очереди.')
+
+    def handle(self, *args, **options):
+        while True:
+            done = run_database_tasks()
+            if options['once']:
+                self.stdout.write(f'Выполнено попыток: {done}.')
+                return
+            close_old_connections()
+            if not done:
+                time.sleep(options['interval'])
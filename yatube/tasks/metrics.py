@@ -0,0 +1,35 @@
+from collections import defaultdict
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from yatube.metrics import TaskMetrics
+
+from .models import TaskCounter
+
+
+def store_attempt(name, outcome, wait_ms, duration_ms):
+    """Прибавляет попытку задачи к счётчикам в базе."""
+    attempt = TaskMetrics()
+    attempt.record(outcome, wait_ms, duration_ms)
+    with transaction.atomic():
+        for key, value in attempt.counters().items():
+            counters = TaskCounter.objects.filter(name=name, key=key)
+            if counters.update(value=F('value') + value):
+                continue
+            try:
+                with transaction.atomic():
+                    TaskCounter.objects.create(name=name, key=key,
+                                               value=value)
+            except IntegrityError:
+                # Счётчик только что создал другой воркер.
+                counters.update(value=F('value') + value)
+
+
+def stored_metrics():
+    """{имя задачи: TaskMetrics} по счётчикам в базе."""
+    counters = defaultdict(dict)
+    for name, key, value in TaskCounter.objects.values_list(
+            'name', 'key', 'value'):
+        counters[name][key] = value
+    return {name: TaskMetrics.from_counters(values)
+            for name, values in counters.items()}
@@ -0,0 +1,25 @@
+# Generated by Django 2.2.28 on 2026-10-18 20:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskCounter',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+                ('key', models.CharField(max_length=64)),
+                ('value', models.FloatField(default=0)),
+            ],
+            options={
+                'unique_together': {('name', 'key')},
+            },
+        ),
+    ]
@@ -0,0 +1,47 @@
+from django.db import models
+from django.utils import timezone
+
+
+class QueuedTask(models.Model):
+    """Задача в очереди TASKS_BACKEND = 'database'.
+
+    Выполненные задачи удаляются, исчерпавшие попытки остаются с
+    failed и текстом последней ошибки.
+    """
+    name = models.CharField(max_length=255)
+    payload = models.TextField()
+    attempt = models.PositiveIntegerField(default=1)
+    run_at = models.DateTimeField(default=timezone.now)
+    # Воркер, взявший задачу, держит её до этого времени; после него
+    # задачу упавшего воркера возьмёт другой.
+    locked_until = models.DateTimeField(null=True, blank=True)
+    failed = models.BooleanField(default=False)
+    error = models.TextField(blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ('run_at',)
+        indexes = [
+            models.Index(fields=['failed', 'run_at'],
+                         name='task_ready_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.name} #{self.pk}'
+
+
+class TaskCounter(models.Model):
+    """Метрики попыток задач из таблицы, см. tasks/metrics.py.
+
+    Задачи из таблицы выполняет отдельный процесс, поэтому его цифры
+    складываются в базе, откуда их читает сайт.
+    """
+    name = models.CharField(max_length=255)
+    key = models.CharField(max_length=64)
+    value = models.FloatField(default=0)
+
+    class Meta:
+        unique_together = ('name', 'key')
+
+    def __str__(self):
+        return f'{self.name} {self.key}'
@@ -0,0 +1,218 @@
+import json
+import logging
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from importlib import import_module
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+from yatube.metrics import registry
+
+from .metrics import store_attempt
+from .models import QueuedTask
+
+logger = logging.getLogger(__name__)
+
+_tasks = {}
+_executor = None
+
+
+class Task:
+    """Функция, которую можно выполнить в фоне: task.delay(*args).
+
+    Аргументы проходят через JSON, поэтому задаче передаются
+    идентификаторы объектов, а не сами объекты. Задача может
+    выполниться повторно, так что она должна быть идемпотентной.
+    """
+
+    def __init__(self, func, retries=None):
+        self.func = func
+        self.name = f'{func.__module__}.{func.__name__}'
+        self._retries = retries
+
+    @property
+    def retries(self):
+        if self._retries is None:
+            return settings.TASKS_MAX_RETRIES
+        return self._retries
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def delay(self, *args, **kwargs):
+        enqueue(self, args, kwargs)
+
+
+def task(func=None, retries=None):
+    """Регистрирует функцию как задачу: @task или @task(retries=5)."""
+    if func is None:
+        return lambda func: task(func, retries)
+    wrapped = Task(func, retries)
+    _tasks[wrapped.name] = wrapped
+    return wrapped
+
+
+def get_task(name):
+    """Задача по имени; её модуль импортируется при первом обращении."""
+    if name not in _tasks:
+        import_module(name.rpartition('.')[0])
+    return _tasks[name]
+
+
+def retry_delay(attempt):
+    """Секунды до следующей попытки: задержка удваивается каждый раз."""
+    return settings.TASKS_RETRY_DELAY * 2 ** (attempt - 1)
+
+
+def enqueue(task, args=(), kwargs=None):
+    """Ставит задачу в очередь TASKS_BACKEND.
+
+    Пул потоков получает задачу после фиксации текущей транзакции,
+    чтобы она видела записанные данные, а при откате не запускалась
+    вовсе. В таблицу задача пишется в той же транзакции и так же
+    становится видна воркеру только после фиксации.
+    """
+    payload = json.dumps({'args': list(args), 'kwargs': kwargs or {}})
+    backend = settings.TASKS_BACKEND
+    registry.task_enqueued(task.name)
+    if backend == 'thread':
+        transaction.on_commit(lambda: submit(task, payload))
+    elif backend == 'database':
+        QueuedTask.objects.create(name=task.name, payload=payload)
+    else:
+        raise ImproperlyConfigured(f'Неизвестный TASKS_BACKEND: {backend}')
+
+
+def run_attempt(task, payload, attempt, ready_at, record):
+    """Одна попытка задачи с записью метрик через record.
+
+    ready_at — момент, с которого задача ждала исполнителя, в
+    секундах time.time(). Возвращает исход (succeeded, retried или
+    failed) и текст ошибки.
+    """
+    started = time.time()
+    error = ''
+    try:
+        data = json.loads(payload)
+        task(*data['args'], **data['kwargs'])
+        outcome = 'succeeded'
+    except Exception:
+        error = traceback.format_exc()
+        outcome = 'retried' if attempt <= task.retries else 'failed'
+        logger.exception('%s: попытка %s не удалась', task.name, attempt)
+    record(task.name, outcome, wait_ms=max(started - ready_at, 0) * 1000,
+           duration_ms=(time.time() - started) * 1000)
+    return outcome, error
+
+
+def run_inline(task, payload):
+    """Выполняет задачу в текущем потоке, повторяя без задержек."""
+    attempt = 1
+    while run_attempt(task, payload, attempt, time.time(),
+                      registry.record_task)[0] == 'retried':
+        attempt += 1
+
+
+def executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=settings.TASKS_WORKERS,
+                                       thread_name_prefix='tasks')
+    return _executor
+
+
+def submit(task, payload, attempt=1):
+    """Отдаёт задачу пулу потоков, а с TASKS_WORKERS = 0 выполняет её
+    сразу, в потоке, зафиксировавшем транзакцию."""
+    if not settings.TASKS_WORKERS:
+        run_inline(task, payload)
+        return
+    executor().submit(run_in_thread, task, payload, attempt, time.time())
+
+
+def run_in_thread(task, payload, attempt, ready_at):
+    try:
+        outcome, _ = run_attempt(task, payload, attempt, ready_at,
+                                 registry.record_task)
+    finally:
+        # Потоки пула живут долго и не должны держать соединения с базой.
+        close_old_connections()
+    if outcome == 'retried':
+        # Повтор ждёт в таймере, а не в потоке пула, чтобы не занимать
+        # его на время задержки.
+        timer = threading.Timer(retry_delay(attempt), submit,
+                                (task, payload, attempt + 1))
+        timer.daemon = True
+        timer.start()
+
+
+def ready_tasks(now):
+    return QueuedTask.objects.filter(
+        Q(locked_until=None) | Q(locked_until__lt=now),
+        failed=False, run_at__lte=now)
+
+
+def claim_next():
+    """Берёт самую раннюю готовую задачу из таблицы или возвращает None.
+
+    Задачу забирает тот воркер, чей UPDATE её изменил, так что
+    несколько процессов run_tasks не выполнят её дважды.
+    """
+    while True:
+        now = timezone.now()
+        queued = ready_tasks(now).order_by('run_at').first()
+        if queued is None:
+            return None
+        locked_until = now + timedelta(seconds=settings.TASKS_LOCK_TIMEOUT)
+        if ready_tasks(now).filter(pk=queued.pk).update(
+                locked_until=locked_until):
+            queued.locked_until = locked_until
+            return queued
+
+
+def run_queued(queued):
+    """Выполняет задачу из таблицы и удаляет её или откладывает повтор."""
+    try:
+        task = get_task(queued.name)
+    except (ImportError, KeyError):
+        logger.error('Неизвестная задача %s', queued.name)
+        store_attempt(queued.name, 'failed', 0, 0)
+        QueuedTask.objects.filter(pk=queued.pk).update(
+            failed=True, locked_until=None,
+            error=f'Неизвестная задача {queued.name}')
+        return 'failed'
+    # Воркер — отдельный процесс, поэтому его метрики пишутся в базу.
+    outcome, error = run_attempt(task, queued.payload, queued.attempt,
+                                 queued.run_at.timestamp(), store_attempt)
+    tasks = QueuedTask.objects.filter(pk=queued.pk)
+    if outcome == 'succeeded':
+        tasks.delete()
+    elif outcome == 'retried':
+        tasks.update(
+            attempt=queued.attempt + 1, locked_until=None, error=error,
+            run_at=timezone.now() + timedelta(
+                seconds=retry_delay(queued.attempt)))
+    else:
+        tasks.update(failed=True, locked_until=None, error=error)
+    return outcome
+
+
+def run_database_tasks(limit=None):
+    """Выполняет готовые задачи из таблицы, пока они есть.
+
+    Возвращает число выполненных попыток.
+    """
+    done = 0
+    while limit is None or done < limit:
+        queued = claim_next()
+        if queued is None:
+            break
+        run_queued(queued)
+        done += 1
+    return done
@@ -0,0 +1,154 @@
+import threading
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.management import call_command
+from django.db import transaction
+from django.test import Client, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from posts.models import Follow, Post, TimelineEntry
+from yatube.metrics import registry
+
+from ..models import QueuedTask
+from ..queue import task
+from ..testing import run_on_commit_callbacks
+
+User = get_user_model()
+
+calls = {}
+finished = threading.Event()
+
+
+@task
+def flaky(key, failures):
+    """Падает первые failures раз."""
+    calls[key] = calls.get(key, 0) + 1
+    if calls[key] <= failures:
+        raise ValueError(f'{key}: попытка {calls[key]}')
+    finished.set()
+
+
+@task(retries=1)
+def broken():
+    raise ValueError('Сломано')
+
+
+def run_tasks():
+    out = StringIO()
+    call_command('run_tasks', '--once', stdout=out)
+    return out.getvalue()
+
+
+class QueueTest(TestCase):
+    def setUp(self):
+        calls.clear()
+        registry.reset()
+
+    def test_task_runs_after_commit_with_retries(self):
+        """Задача запускается после фиксации транзакции, упавшая
+        повторяется, попытки видны в метриках."""
+        with self.assertLogs('tasks.queue', 'ERROR'):
+            with run_on_commit_callbacks():
+                flaky.delay('commit', 2)
+                self.assertNotIn('commit', calls)
+        self.assertEqual(calls['commit'], 3)
+        metrics = registry.task_snapshot()[flaky.name]
+        self.assertEqual(
+            [metrics[key] for key in
+             ('enqueued', 'retried', 'succeeded', 'failed')],
+            [1, 2, 1, 0])
+        self.assertEqual(sum(metrics['duration_ms']['buckets'].values()), 3)
+
+    def test_rolled_back_task_does_not_run(self):
+        """При откате транзакции задача не запускается."""
+        with run_on_commit_callbacks():
+            with self.assertRaises(ValueError), transaction.atomic():
+                flaky.delay('rollback', 0)
+                raise ValueError('Откат')
+        self.assertNotIn('rollback', calls)
+
+    @override_settings(TASKS_BACKEND='database', TASKS_RETRY_DELAY=0)
+    def test_database_backend_runs_in_worker(self):
+        """Задача ждёт в таблице, пока её не выполнит run_tasks."""
+        flaky.delay('database', 1)
+        self.assertNotIn('database', calls)
+        self.assertEqual(QueuedTask.objects.get().name, flaky.name)
+        with self.assertLogs('tasks.queue', 'ERROR'):
+            out = run_tasks()
+        self.assertIn('Выполнено попыток: 2.', out)
+        self.assertEqual(calls['database'], 2)
+        self.assertFalse(QueuedTask.objects.exists())
+        # Метрики воркера лежат в базе и видны процессу сайта.
+        metrics = registry.task_snapshot()[flaky.name]
+        self.assertEqual(
+            [metrics[key] for key in
+             ('enqueued', 'retried', 'succeeded', 'failed')],
+            [1, 1, 1, 0])
+        self.assertEqual(sum(metrics['duration_ms']['buckets'].values()), 2)
+
+    @override_settings(TASKS_BACKEND='database', TASKS_RETRY_DELAY=60)
+    def test_retries_are_delayed_and_failures_kept(self):
+        """Повтор откладывается, исчерпавшая попытки задача остаётся."""
+        broken.delay()
+        with self.assertLogs('tasks.queue', 'ERROR'):
+            run_tasks()
+        queued = QueuedTask.objects.get()
+        self.assertEqual(queued.attempt, 2)
+        self.assertIn('Сломано', queued.error)
+        QueuedTask.objects.update(run_at=queued.created)
+        with self.assertLogs('tasks.queue', 'ERROR'):
+            run_tasks()
+        self.assertTrue(QueuedTask.objects.get().failed)
+        self.assertEqual(registry.task_snapshot()[broken.name]['failed'], 1)
+
+
+@override_settings(TASKS_BACKEND='database')
+class DeferredSideEffectsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username='author', email='author@example.com',
+            password='pass')
+        cls.reader = User.objects.create_user(username='reader')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def test_new_post_fans_out_in_worker(self):
+        """Пост попадает в ленты подписчиков из фоновой задачи."""
+        client = Client()
+        client.force_login(self.author)
+        client.post(reverse('posts:new_post'), {'text': 'Новый пост'})
+        self.assertTrue(Post.objects.filter(text='Новый пост').exists())
+        self.assertFalse(TimelineEntry.objects.exists())
+        run_tasks()
+        self.assertEqual(
+            TimelineEntry.objects.get().user_id, self.reader.pk)
+
+    @override_settings(
+        EMAIL_BACKEND='tasks.mail.QueuedEmailBackend',
+        TASKS_EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend')
+    def test_password_reset_email_is_queued(self):
+        """Письмо сброса пароля отправляет воркер, а не запрос."""
+        response = Client().post(reverse('password_reset'),
+                                 {'email': 'author@example.com'})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(len(mail.outbox), 0)
+        run_tasks()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['author@example.com'])
+        self.assertIn('author', mail.outbox[0].body)
+
+
+@override_settings(TASKS_WORKERS=2, TASKS_RETRY_DELAY=0)
+class ThreadBackendTest(SimpleTestCase):
+    def setUp(self):
+        calls.clear()
+        finished.clear()
+
+    def test_task_runs_and_retries_in_pool(self):
+        """Вне транзакции задача сразу уходит в пул потоков."""
+        with self.assertLogs('tasks.queue', 'ERROR'):
+            flaky.delay('thread', 1)
+            self.assertTrue(finished.wait(5))
+        self.assertEqual(calls['thread'], 2)
@@ -0,0 +1,19 @@
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.contrib.auth.admin import UserAdmin
+from posts.admin import ChunkedDeletionMixin
+from posts.deletion import delete_user
+from posts.tasks import delete_user_in_batches
+
+User = get_user_model()
+
+
+class AuthorAdmin(ChunkedDeletionMixin, UserAdmin):
+    delete_function = staticmethod(delete_user)
+    delete_task = delete_user_in_batches
+    posts_field = 'author'
+
+
+# Импорт UserAdmin уже зарегистрировал стандартную админку пользователей.
+admin.site.unregister(User)
+admin.site.register(User, AuthorAdmin)
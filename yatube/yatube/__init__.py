@@ -0,0 +1,5 @@
+from django.db.backends.signals import connection_created
+
+from .db import configure_sqlite
+
+connection_created.connect(configure_sqlite)
@@ -0,0 +1,103 @@
+import gzip
+
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_sequence
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Типы ответов, которые сжимает CompressionMiddleware.
+COMPRESSIBLE_TYPES = {
+    'text/html', 'application/json', 'application/x-ndjson',
+}
+# Расширения статики, для которых collectstatic пишет сжатые копии.
+COMPRESSIBLE_EXTENSIONS = (
+    '.css', '.js', '.map', '.svg', '.txt', '.json', '.html', '.xml',
+)
+# Короткие ответы сжатием почти не уменьшаются.
+MIN_LENGTH = 200
+
+
+def gzip_bytes(data, level=6):
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def brotli_bytes(data, quality=5):
+    return brotli.compress(data, quality=quality)
+
+
+def brotli_sequence(sequence):
+    compressor = brotli.Compressor(quality=5)
+    for item in sequence:
+        data = compressor.process(item)
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+def accepted_encodings(header):
+    """Кодировки из Accept-Encoding, кроме запрещённых через q=0."""
+    encodings = set()
+    for part in header.split(','):
+        name, _, params = part.strip().partition(';')
+        quality = params.strip()
+        if quality.startswith('q='):
+            try:
+                if float(quality[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        encodings.add(name.strip().lower())
+    return encodings
+
+
+def choose_encoding(header):
+    """br, если он установлен и принимается клиентом, иначе gzip."""
+    accepted = accepted_encodings(header)
+    if brotli is not None and 'br' in accepted:
+        return 'br'
+    if 'gzip' in accepted:
+        return 'gzip'
+    return None
+
+
+def is_compressible(response):
+    content_type = response.get('Content-Type', '').split(';')[0].strip()
+    return (content_type in COMPRESSIBLE_TYPES
+            and not response.has_header('Content-Encoding'))
+
+
+def compress_response(request, response):
+    """Сжимает ответ под Accept-Encoding запроса, если это имеет смысл.
+
+    Потоковый ответ сжимается по мере отдачи частей и не читается в
+    память целиком.
+    """
+    if not is_compressible(response):
+        return response
+    if not response.streaming and len(response.content) < MIN_LENGTH:
+        return response
+    patch_vary_headers(response, ('Accept-Encoding',))
+    encoding = choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+    if encoding is None:
+        return response
+    if response.streaming:
+        compress = brotli_sequence if encoding == 'br' else compress_sequence
+        response.streaming_content = compress(response.streaming_content)
+        del response['Content-Length']
+    else:
+        compress = brotli_bytes if encoding == 'br' else gzip_bytes
+        compressed = compress(response.content)
+        if len(compressed) >= len(response.content):
+            return response
+        response.content = compressed
+        response['Content-Length'] = str(len(compressed))
+    # Сжатые байты отличаются от исходных, поэтому строгий ETag
+    # становится слабым, как в GZipMiddleware.
+    etag = response.get('ETag')
+    if etag and etag.startswith('"'):
+        response['ETag'] = 'W/' + etag
+    response['Content-Encoding'] = encoding
+    return response
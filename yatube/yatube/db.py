@@ -0,0 +1,19 @@
+from django.conf import settings
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    """Выполняет SQLITE_PRAGMAS на каждом новом соединении с SQLite.
+
+    Команды идут мимо курсора Django, поэтому не попадают ни в подсчёт
+    запросов страницы, ни в её бюджет.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    for name, value in settings.SQLITE_PRAGMAS.items():
+        connection.connection.execute(f'PRAGMA {name} = {value}')
+    if (connection.settings_dict['TEST']['MIRROR']
+            and connection.is_in_memory_db()):
+        # Зеркало тестовой базы в памяти — второе соединение с общим
+        # кешем. Без read_uncommitted оно упирается в блокировки таблиц
+        # незавершённой транзакции TestCase, с ним — видит её данные.
+        connection.connection.execute('PRAGMA read_uncommitted = 1')
@@ -0,0 +1,189 @@
+import threading
+from bisect import bisect_left
+
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import JsonResponse
+
+# Верхние границы корзин гистограмм; последняя корзина — всё, что больше.
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class Histogram:
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.total = 0
+
+    def labels(self):
+        labels = [f'<={bound}' for bound in self.bounds]
+        labels.append(f'>{self.bounds[-1]}')
+        return labels
+
+    def add(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.total += value
+
+    def merge(self, other):
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.total += other.total
+
+    def as_dict(self):
+        return {'buckets': dict(zip(self.labels(), self.counts)),
+                'sum': round(self.total, 3)}
+
+
+class ViewMetrics:
+    def __init__(self):
+        self.requests = 0
+        self.over_budget = 0
+        self.latency = Histogram(LATENCY_BUCKETS_MS)
+        self.db_time = Histogram(LATENCY_BUCKETS_MS)
+        self.template_time = Histogram(LATENCY_BUCKETS_MS)
+        self.queries = Histogram(QUERY_BUCKETS)
+
+    def as_dict(self):
+        return {
+            'requests': self.requests,
+            'over_budget': self.over_budget,
+            'latency_ms': self.latency.as_dict(),
+            'db_ms': self.db_time.as_dict(),
+            'template_ms': self.template_time.as_dict(),
+            'queries': self.queries.as_dict(),
+        }
+
+
+class TaskMetrics:
+    COUNTS = ('enqueued', 'succeeded', 'retried', 'failed')
+
+    def __init__(self):
+        self.enqueued = 0
+        self.succeeded = 0
+        self.retried = 0
+        self.failed = 0
+        self.wait = Histogram(LATENCY_BUCKETS_MS)
+        self.duration = Histogram(LATENCY_BUCKETS_MS)
+
+    def histograms(self):
+        return {'wait_ms': self.wait, 'duration_ms': self.duration}
+
+    def record(self, outcome, wait_ms, duration_ms):
+        """Попытка задачи: outcome — succeeded, retried или failed."""
+        setattr(self, outcome, getattr(self, outcome) + 1)
+        self.wait.add(wait_ms)
+        self.duration.add(duration_ms)
+
+    def merge(self, other):
+        for name in self.COUNTS:
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        for name, histogram in self.histograms().items():
+            histogram.merge(other.histograms()[name])
+
+    def counters(self):
+        """Ненулевые значения плоским словарём {ключ: число}.
+
+        В таком виде метрики складываются в базе, см. tasks/metrics.py.
+        """
+        counters = {name: getattr(self, name) for name in self.COUNTS}
+        for name, histogram in self.histograms().items():
+            counters.update(
+                (f'{name}:{label}', count)
+                for label, count in zip(histogram.labels(), histogram.counts))
+            counters[f'{name}:sum'] = histogram.total
+        return {key: value for key, value in counters.items() if value}
+
+    @classmethod
+    def from_counters(cls, counters):
+        metrics = cls()
+        histograms = metrics.histograms()
+        for key, value in counters.items():
+            name, _, label = key.partition(':')
+            if name in cls.COUNTS:
+                setattr(metrics, name, int(value))
+            elif label == 'sum':
+                histograms[name].total = value
+            else:
+                histogram = histograms[name]
+                histogram.counts[histogram.labels().index(label)] = int(value)
+        return metrics
+
+    def as_dict(self):
+        return {
+            'enqueued': self.enqueued,
+            'succeeded': self.succeeded,
+            'retried': self.retried,
+            'failed': self.failed,
+            'wait_ms': self.wait.as_dict(),
+            'duration_ms': self.duration.as_dict(),
+        }
+
+
+class Registry:
+    """Гистограммы по именам URL и фоновых задач в памяти процесса.
+
+    У каждого процесса сервера свои цифры; после перезапуска они
+    начинаются заново. Метрики задач, выполненных в других процессах,
+    добавляют источники из add_task_source.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.views = {}
+        self.tasks = {}
+        self.task_sources = []
+
+    def record(self, name, timings, over_budget=False):
+        with self.lock:
+            metrics = self.views.setdefault(name, ViewMetrics())
+            metrics.requests += 1
+            metrics.over_budget += over_budget
+            metrics.latency.add(timings.total_ms)
+            metrics.db_time.add(timings.db_ms)
+            metrics.template_time.add(timings.template_ms)
+            metrics.queries.add(timings.queries)
+
+    def task_enqueued(self, name):
+        with self.lock:
+            self.tasks.setdefault(name, TaskMetrics()).enqueued += 1
+
+    def record_task(self, name, outcome, wait_ms, duration_ms):
+        with self.lock:
+            self.tasks.setdefault(name, TaskMetrics()).record(
+                outcome, wait_ms, duration_ms)
+
+    def add_task_source(self, source):
+        """source() возвращает {имя задачи: TaskMetrics} извне процесса."""
+        self.task_sources.append(source)
+
+    def snapshot(self):
+        with self.lock:
+            return {name: metrics.as_dict()
+                    for name, metrics in sorted(self.views.items())}
+
+    def task_snapshot(self):
+        tasks = {}
+        for source in self.task_sources:
+            for name, metrics in source().items():
+                tasks.setdefault(name, TaskMetrics()).merge(metrics)
+        with self.lock:
+            for name, metrics in self.tasks.items():
+                tasks.setdefault(name, TaskMetrics()).merge(metrics)
+        return {name: metrics.as_dict()
+                for name, metrics in sorted(tasks.items())}
+
+    def reset(self):
+        with self.lock:
+            self.views.clear()
+            self.tasks.clear()
+
+
+registry = Registry()
+
+
+@staff_member_required
+def metrics_view(request):
+    # Имени URL tasks нет, так что задачи не смешаются со страницами.
+    metrics = registry.snapshot()
+    metrics['tasks'] = registry.task_snapshot()
+    return JsonResponse(metrics,
+                        json_dumps_params={'ensure_ascii': False})
@@ -0,0 +1,211 @@
+import logging
+import threading
+from contextlib import ExitStack
+from functools import wraps
+from time import perf_counter
+
+from django.conf import settings
+from django.db import connections
+from django.template.base import Template
+
+from .compression import compress_response
+from .metrics import registry
+from .profiler import install_profiler, profiling
+from .routers import set_replica_reads
+
+logger = logging.getLogger(__name__)
+profiler_logger = logging.getLogger('yatube.profiler')
+
+_local = threading.local()
+
+# Cookie, с которым клиент после записи читает только из default.
+PRIMARY_COOKIE = 'use_primary'
+WRITE_STATEMENTS = {'INSERT', 'UPDATE', 'DELETE', 'REPLACE'}
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+class RequestTimings:
+    """Запросы к базе и время одного HTTP-запроса в миллисекундах."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_ms = 0.0
+        self.template_ms = 0.0
+        self.total_ms = 0.0
+        self.rendering = False
+
+    def __call__(self, execute, sql, params, many, context):
+        # Обёртка для connection.execute_wrapper.
+        started = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_ms += (perf_counter() - started) * 1000
+
+    def server_timing(self):
+        return (f'db;dur={self.db_ms:.1f};desc="{self.queries} queries", '
+                f'tpl;dur={self.template_ms:.1f}, '
+                f'total;dur={self.total_ms:.1f}')
+
+
+def timed_render(render):
+    """Считает время отрисовки шаблонов верхнего уровня.
+
+    Вложенные шаблоны (include, extends) уже входят во время
+    внешнего и отдельно не учитываются.
+    """
+    @wraps(render)
+    def wrapper(self, context):
+        timings = getattr(_local, 'timings', None)
+        if timings is None or timings.rendering:
+            return render(self, context)
+        timings.rendering = True
+        started = perf_counter()
+        try:
+            return render(self, context)
+        finally:
+            timings.template_ms += (perf_counter() - started) * 1000
+            timings.rendering = False
+    wrapper.timed = True
+    return wrapper
+
+
+def install_template_timer():
+    if not getattr(Template.render, 'timed', False):
+        Template.render = timed_render(Template.render)
+
+
+def url_name(request):
+    """Имя URL с пространством имён приложения, например posts:index."""
+    match = getattr(request, 'resolver_match', None)
+    if match is None or not match.url_name:
+        return None
+    return ':'.join([*match.app_names, match.url_name])
+
+
+def budget_overrun(name, timings):
+    """Сообщение о превышении QUERY_BUDGETS или None."""
+    budget = settings.QUERY_BUDGETS.get(name)
+    if budget is None or timings.queries <= budget:
+        return None
+    return f'{name}: {timings.queries} запросов к базе при бюджете {budget}'
+
+
+class MetricsMiddleware:
+    """Число запросов к базе, время базы, шаблонов и ответа.
+
+    Цифры каждого запроса уходят в заголовок Server-Timing, а по именам
+    URL копятся в гистограммах на странице /admin/metrics/. Запросы,
+    которые потоковый ответ делает уже после выхода из view, не
+    учитываются.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        install_template_timer()
+
+    def __call__(self, request):
+        timings = RequestTimings()
+        _local.timings = timings
+        started = perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(timings))
+                response = self.get_response(request)
+        finally:
+            _local.timings = None
+        timings.total_ms = (perf_counter() - started) * 1000
+        if settings.METRICS_SERVER_TIMING:
+            response['Server-Timing'] = timings.server_timing()
+        name = url_name(request)
+        if name is not None:
+            overrun = budget_overrun(name, timings)
+            registry.record(name, timings, over_budget=overrun is not None)
+            if overrun is not None:
+                # В тестах превышение бюджета — ошибка, в работе — запись
+                # в журнале.
+                if settings.QUERY_BUDGET_RAISE:
+                    raise QueryBudgetExceeded(overrun)
+                logger.warning(overrun)
+        return response
+
+
+class WriteDetector:
+    """Обёртка execute_wrapper, замечающая запись в базу."""
+
+    def __init__(self):
+        self.seen = False
+
+    def __call__(self, execute, sql, params, many, context):
+        if not self.seen:
+            statement = sql.lstrip().split(None, 1)[:1]
+            self.seen = statement[0].upper() in WRITE_STATEMENTS
+        return execute(sql, params, many, context)
+
+
+class ReplicaMiddleware:
+    """GET-запросы страниц из REPLICA_VIEWS читают из реплик.
+
+    Запрос, который что-то записал в базу, ставит клиенту cookie, и
+    следующие REPLICA_STICKY_SECONDS секунд его страницы читаются из
+    default: отставание реплики не прячет только что сделанную правку.
+    Без REPLICA_ALIASES ничего не делает.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.REPLICA_ALIASES:
+            return self.get_response(request)
+        writes = WriteDetector()
+        try:
+            with connections['default'].execute_wrapper(writes):
+                response = self.get_response(request)
+        finally:
+            set_replica_reads(False)
+        if writes.seen:
+            response.set_cookie(
+                PRIMARY_COOKIE, '1', max_age=settings.REPLICA_STICKY_SECONDS,
+                httponly=True, samesite='Lax')
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        set_replica_reads(
+            bool(settings.REPLICA_ALIASES)
+            and request.method in ('GET', 'HEAD')
+            and PRIMARY_COOKIE not in request.COOKIES
+            and url_name(request) in settings.REPLICA_VIEWS)
+
+
+class CompressionMiddleware:
+    """Сжимает HTML и JSON gzip или brotli, см. yatube/compression.py."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return compress_response(request, self.get_response(request))
+
+
+class TemplateProfilerMiddleware:
+    """Пишет в журнал yatube.profiler, сколько заняли шаблоны запроса."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        install_profiler()
+
+    def __call__(self, request):
+        with profiling() as profile:
+            response = self.get_response(request)
+        if profile.stats:
+            profiler_logger.info(
+                '%s %s: шаблоны %.1f мс\n%s', request.method,
+                request.get_full_path(), profile.total_ms(),
+                profile.report())
+        return response
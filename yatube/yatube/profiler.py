@@ -0,0 +1,78 @@
+import threading
+from contextlib import contextmanager
+from functools import wraps
+from time import perf_counter
+
+from django.template.base import Template
+
+_local = threading.local()
+
+
+class TemplateProfile:
+    """Время отрисовки шаблонов одного запроса по их именам.
+
+    Считается каждая отрисовка: страница, родитель из extends и каждый
+    include, в том числе внутри цикла. Полное время включает вложенные
+    шаблоны, собственное — нет, так что собственные времена в сумме
+    дают время отрисовки всего запроса.
+    """
+
+    def __init__(self):
+        self.stats = {}
+        self.children = []
+
+    def enter(self):
+        self.children.append(0.0)
+        return perf_counter()
+
+    def leave(self, name, started):
+        elapsed = (perf_counter() - started) * 1000
+        children = self.children.pop()
+        if self.children:
+            self.children[-1] += elapsed
+        calls, total, own = self.stats.get(name, (0, 0.0, 0.0))
+        self.stats[name] = (calls + 1, total + elapsed,
+                            own + elapsed - children)
+
+    def total_ms(self):
+        return sum(own for _, _, own in self.stats.values())
+
+    def report(self):
+        rows = sorted(self.stats.items(), key=lambda item: -item[1][2])
+        return '\n'.join(
+            f'{name}: {calls} раз, всего {total:.1f} мс, '
+            f'собственное {own:.1f} мс'
+            for name, (calls, total, own) in rows)
+
+
+def profiled_render(render):
+    @wraps(render)
+    def wrapper(self, context):
+        profile = getattr(_local, 'profile', None)
+        if profile is None:
+            return render(self, context)
+        started = profile.enter()
+        try:
+            return render(self, context)
+        finally:
+            profile.leave(self.origin.template_name or self.origin.name,
+                          started)
+    wrapper.profiled = True
+    return wrapper
+
+
+def install_profiler():
+    # Template._render вызывают и render, и extends, и include.
+    if not getattr(Template._render, 'profiled', False):
+        Template._render = profiled_render(Template._render)
+
+
+@contextmanager
+def profiling():
+    """Собирает TemplateProfile отрисовок в текущем потоке."""
+    profile = TemplateProfile()
+    _local.profile = profile
+    try:
+        yield profile
+    finally:
+        _local.profile = None
@@ -0,0 +1,40 @@
+import random
+import threading
+
+from django.conf import settings
+
+_local = threading.local()
+
+
+def set_replica_reads(enabled):
+    """Включает чтение из реплик для текущего потока."""
+    _local.replica_reads = enabled
+
+
+def replica_reads_active():
+    """Читает ли текущий поток из реплик."""
+    return bool(settings.REPLICA_ALIASES) and getattr(
+        _local, 'replica_reads', False)
+
+
+class ReplicaRouter:
+    """Чтения страниц, отмеченных ReplicaMiddleware, — из реплик.
+
+    Запись и всё остальное идут в default. Реплики повторяют default,
+    поэтому связи между объектами из разных баз разрешены, а миграции
+    применяются только к default.
+    """
+
+    def db_for_read(self, model, **hints):
+        if replica_reads_active():
+            return random.choice(settings.REPLICA_ALIASES)
+        return None
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        return db == 'default'
@@ -0,0 +1,3 @@
+# По умолчанию — настройки для разработки, у тестов свои:
+# yatube.settings.test. В работе: DJANGO_SETTINGS_MODULE=yatube.settings.prod.
+from .dev import *  # noqa: F401,F403
@@ -0,0 +1,258 @@
+import os
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))))
+
+
+SECRET_KEY = ')h%jo_lj!*^nom^z!l$=vdt6ug_+uank*aoaph$l5ly9$=4^tq'
+
+DEBUG = False
+
+ALLOWED_HOSTS = [
+    "localhost",
+    "127.0.0.1",
+    "[::1]",
+    "testserver",
+]
+
+
+INSTALLED_APPS = [
+    'about',
+    'users',
+    'posts',
+    'tasks',
+    'django.contrib.admin',
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+    'sorl.thumbnail',
+]
+
+MIDDLEWARE = [
+    'yatube.middleware.MetricsMiddleware',
+    'yatube.middleware.CompressionMiddleware',
+    'yatube.middleware.ReplicaMiddleware',
+    'django.middleware.security.SecurityMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+]
+
+ROOT_URLCONF = 'yatube.urls'
+
+TEMPLATES_DIR = os.path.join(BASE_DIR, "templates")
+TEMPLATES = [
+    {
+        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'DIRS': [TEMPLATES_DIR],
+        'APP_DIRS': True,
+        'OPTIONS': {
+            'context_processors': [
+                'context_processors.year',
+                'django.template.context_processors.debug',
+                'django.template.context_processors.request',
+                'django.contrib.auth.context_processors.auth',
+                'django.contrib.messages.context_processors.messages',
+            ],
+        },
+    },
+]
+
+# Загрузить все шаблоны проекта при старте WSGI-приложения, см.
+# yatube/template_cache.py. Имеет смысл только с кеширующим загрузчиком.
+TEMPLATE_PRECOMPILE = False
+
+WSGI_APPLICATION = 'yatube.wsgi.application'
+
+
+# Database
+# https://docs.djangoproject.com/en/2.2/ref/settings/#databases
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+    },
+    # Реплика для чтения лент — второй файл, который догоняет default
+    # командой sync_replica; в тестах — зеркало тестовой default.
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ.get(
+            'YATUBE_REPLICA_DB', os.path.join(BASE_DIR, 'db.replica.sqlite3')),
+        'TEST': {'MIRROR': 'default'},
+    },
+}
+DATABASE_ROUTERS = ['yatube.routers.ReplicaRouter']
+# Базы, из которых читают страницы REPLICA_VIEWS; пусто — всё из default.
+REPLICA_ALIASES = ()
+REPLICA_VIEWS = (
+    'posts:index', 'posts:group_posts', 'posts:profile', 'posts:post_view',
+)
+# Сколько секунд после записи клиент читает только из default. Это же
+# наибольшее отставание реплики: sync_replica должна успевать чаще.
+# Она копирует базу целиком, и на базе в миллионы строк одна копия
+# может идти дольше окна — тогда команда предупреждает об этом.
+REPLICA_STICKY_SECONDS = 10
+# PRAGMA для каждого нового соединения с SQLite, см. yatube/db.py.
+SQLITE_PRAGMAS = {}
+
+
+# Password validation
+# https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
+
+AUTH_PASSWORD_VALIDATORS = [
+    {
+        'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator',
+    },
+]
+
+
+# Internationalization
+# https://docs.djangoproject.com/en/2.2/topics/i18n/
+
+LANGUAGE_CODE = 'ru'
+
+TIME_ZONE = 'UTC'
+
+USE_I18N = True
+
+USE_L10N = True
+
+USE_TZ = False
+
+
+# Static files (CSS, JavaScript, Images)
+# https://docs.djangoproject.com/en/2.2/howto/static-files/
+
+STATIC_URL = '/static/'
+
+# Исходники статики проекта, в том числе bootstrap и jquery, которые
+# подключает base.html. STATIC_ROOT — только то, что собрал collectstatic.
+STATICFILES_DIRS = [os.path.join(BASE_DIR, "assets")]
+
+STATIC_ROOT = os.path.join(BASE_DIR, "static")
+
+MEDIA_URL = "/media/"
+
+MEDIA_ROOT = os.path.join(BASE_DIR, "media")
+
+
+LOGIN_URL = "/auth/login/"
+LOGIN_REDIRECT_URL = "posts:index"
+# LOGOUT_REDIRECT_URL = "index"
+
+# Письма отправляются фоновой задачей через TASKS_EMAIL_BACKEND.
+EMAIL_BACKEND = "tasks.mail.QueuedEmailBackend"
+TASKS_EMAIL_BACKEND = "django.core.mail.backends.filebased.EmailBackend"
+EMAIL_FILE_PATH = os.path.join(BASE_DIR, "sent_emails")
+
+# Локальная память подходит для разработки и тестов. Если сайт работает
+# в нескольких процессах, кеш должен быть общим — например, файловым.
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}
+if os.environ.get("YATUBE_CACHE_DIR"):
+    CACHES["default"] = {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": os.environ["YATUBE_CACHE_DIR"],
+    }
+
+# Страницы лент сбрасываются сменой версии, срок хранения лишь
+# освобождает место от страниц старых версий.
+FEED_CACHE_TIMEOUT = 60 * 60 * 24
+# Карточки постов: ключ меняется при правке, срок лишь освобождает место.
+POST_FRAGMENT_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Группы по slug и авторы по имени читаются из кеша в памяти процесса.
+# Правки сбрасывают его сигналами и сменой версии ленты, срок хранения
+# ограничивает устаревание при правках в обход них. С
+# LOOKUP_CACHE_SHARED промахи сначала ищутся в общем кеше.
+LOOKUP_CACHE_SIZE = 1000
+LOOKUP_CACHE_TIMEOUT = 60
+LOOKUP_CACHE_SHARED = False
+
+# Новые посты авторов, у которых меньше подписчиков, раскладываются по
+# лентам подписчиков при публикации; ленты популярных авторов
+# собираются при чтении.
+FOLLOW_FANOUT_LIMIT = 1000
+FOLLOW_FANOUT_BATCH_SIZE = 500
+# Сколько последних постов автора попадает в ленту при подписке.
+FOLLOW_BACKFILL = 100
+
+# Пользователи и группы удаляются порциями постов такого размера, см.
+# posts/deletion.py. Из списка в админке — фоновыми задачами.
+DELETION_BATCH_SIZE = 500
+
+# Выборки больше этого размера пагинатор считает приблизительно:
+# по COUNT(*), закешированному на время ниже.
+PAGINATOR_EXACT_COUNT_LIMIT = 10000
+PAGINATOR_COUNT_CACHE_TIMEOUT = 60
+# Брать оценку из статистики таблицы (sqlite_stat1 после ANALYZE,
+# pg_class.reltuples). Стоит лишний запрос при промахе кеша.
+PAGINATOR_TABLE_STATS = False
+
+# Метаданные миниатюр sorl-thumbnail хранятся в базе и кеше, так что
+# отрисовка ленты не открывает картинки и не проверяет файлы на диске.
+THUMBNAIL_KVSTORE = "sorl.thumbnail.kvstores.cached_db_kvstore.KVStore"
+
+# Заголовок Server-Timing с временем базы, шаблонов и всего ответа.
+METRICS_SERVER_TIMING = True
+# Сколько запросов к базе может сделать страница с этим именем URL.
+# Превышение пишется в журнал, а с QUERY_BUDGET_RAISE, как в тестах, —
+# ошибка.
+QUERY_BUDGETS = {
+    'posts:index': 6,
+    'posts:group_posts': 7,
+    'posts:profile': 8,
+    'posts:post_view': 8,
+    'posts:follow_index': 8,
+    'posts:search': 8,
+    'posts:api_index': 4,
+    'posts:api_group_posts': 5,
+    'posts:api_profile': 5,
+    'posts:api_post_view': 5,
+}
+QUERY_BUDGET_RAISE = False
+
+# Фоновые задачи, см. tasks/queue.py. thread — пул из TASKS_WORKERS
+# потоков в процессе сайта, 0 — сразу после фиксации транзакции, в
+# потоке запроса; database — таблица в базе, которую выполняет
+# отдельный процесс manage.py run_tasks.
+TASKS_BACKEND = os.environ.get("YATUBE_TASKS_BACKEND", "thread")
+TASKS_WORKERS = 2
+# Упавшая задача повторяется столько раз, задержка начинается с
+# TASKS_RETRY_DELAY секунд и удваивается с каждой попыткой.
+TASKS_MAX_RETRIES = 3
+TASKS_RETRY_DELAY = 5
+# Сколько секунд задача из таблицы закреплена за взявшим её воркером.
+TASKS_LOCK_TIMEOUT = 300
+
+# Время отрисовки каждого шаблона и include запроса в журнале
+# yatube.profiler, см. yatube/profiler.py. По умолчанию выключено,
+# включается переменной окружения в любых настройках, и в рабочих тоже.
+if os.environ.get("YATUBE_TEMPLATE_PROFILER"):
+    MIDDLEWARE = MIDDLEWARE + ["yatube.middleware.TemplateProfilerMiddleware"]
+    LOGGING = {
+        "version": 1,
+        "disable_existing_loggers": False,
+        "handlers": {"console": {"class": "logging.StreamHandler"}},
+        "loggers": {
+            "yatube.profiler": {"handlers": ["console"], "level": "INFO"},
+        },
+    }
@@ -0,0 +1,53 @@
+import copy
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+from .base import *  # noqa: F401,F403
+
+DEBUG = False
+
+# Ключ из base.py лежит в репозитории и годится только для разработки.
+SECRET_KEY = os.environ.get("YATUBE_SECRET_KEY")
+if not SECRET_KEY:
+    raise ImproperlyConfigured("Задайте секретный ключ в YATUBE_SECRET_KEY.")
+ALLOWED_HOSTS = ALLOWED_HOSTS + [
+    host for host in os.environ.get("YATUBE_ALLOWED_HOSTS", "").split(",")
+    if host
+]
+
+# Шаблоны разбираются один раз на процесс и держатся в памяти, а при
+# старте загружаются все сразу: первый запрос не ждёт чтения с диска.
+TEMPLATES = copy.deepcopy(TEMPLATES)
+TEMPLATES[0]["APP_DIRS"] = False
+TEMPLATES[0]["OPTIONS"]["loaders"] = [
+    ("django.template.loaders.cached.Loader", [
+        "django.template.loaders.filesystem.Loader",
+        "django.template.loaders.app_directories.Loader",
+    ]),
+]
+TEMPLATE_PRECOMPILE = True
+
+# Соединение живёт между запросами, а журнал WAL позволяет читать во
+# время записи: читатели не ждут писателя, писатель — читателей.
+# Одновременные записи по-прежнему идут по очереди, busy_timeout
+# задаёт, сколько миллисекунд писатель ждёт своей очереди, прежде чем
+# получить «database is locked».
+DATABASES = copy.deepcopy(DATABASES)
+DATABASES["default"]["CONN_MAX_AGE"] = 600
+DATABASES["replica"]["CONN_MAX_AGE"] = 600
+# Ленты читаются из реплики, только если задан её файл, см. sync_replica.
+if os.environ.get("YATUBE_REPLICA_DB"):
+    REPLICA_ALIASES = ("replica",)
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    # В режиме WAL NORMAL не теряет целостность при сбое, а
+    # fsync делается только при контрольных точках.
+    "synchronous": "NORMAL",
+    "busy_timeout": 5000,
+    "mmap_size": 256 * 1024 * 1024,
+}
+
+# collectstatic пишет файлы с хешем в имени и их сжатые копии .gz и
+# .br, см. yatube/storage.py.
+STATICFILES_STORAGE = "yatube.storage.CompressedManifestStaticFilesStorage"
@@ -0,0 +1,11 @@
+from .dev import *  # noqa: F401,F403
+
+# Настройки тестов. pytest выбирает их в pytest.ini, manage.py test —
+# через DJANGO_SETTINGS_MODULE=yatube.settings.test, см. README.
+
+# Превышение бюджета запросов — ошибка, а не запись в журнале.
+QUERY_BUDGET_RAISE = True
+
+# Задачи выполняются после фиксации транзакции в потоке запроса. В
+# TestCase транзакция не фиксируется, см. tasks/testing.py.
+TASKS_WORKERS = 0
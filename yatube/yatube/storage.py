@@ -0,0 +1,70 @@
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core import checks
+from django.core.files.base import ContentFile
+from django.utils.module_loading import import_string
+
+from .compression import (COMPRESSIBLE_EXTENSIONS, brotli, brotli_bytes,
+                          gzip_bytes)
+
+# Сторонние файлы, которые подключает templates/base.html.
+VENDOR_ASSETS = (
+    'bootstrap/dist/css/bootstrap.min.css',
+    'jquery/dist/jquery.min.js',
+    'bootstrap/dist/js/bootstrap.min.js',
+)
+
+
+def check_vendor_assets(app_configs, **kwargs):
+    """Без файлов из VENDOR_ASSETS хешированная статика ломает каждую
+    страницу: в манифесте нет их имён."""
+    if not issubclass(import_string(settings.STATICFILES_STORAGE),
+                      ManifestStaticFilesStorage):
+        return []
+    return [
+        checks.Error(f'Статический файл {path} не найден.',
+                     hint='Положите его в STATICFILES_DIRS, см. README.',
+                     id='yatube.E001')
+        for path in VENDOR_ASSETS if finders.find(path) is None
+    ]
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Хешированные имена статики и сжатые копии рядом с файлами.
+
+    collectstatic один раз пишет для каждого текстового файла .gz и,
+    если установлен brotli, .br с наибольшей степенью сжатия. Прокси
+    отдаёт их как есть (gzip_static, brotli_static), а по хешу в имени
+    может кешировать файлы без срока.
+    """
+
+    def post_process(self, paths, dry_run=False, **options):
+        hashed_names = {}
+        for name, hashed_name, processed in super().post_process(
+                paths, dry_run, **options):
+            if hashed_name and not isinstance(processed, Exception):
+                hashed_names[name] = hashed_name
+            yield name, hashed_name, processed
+        if dry_run:
+            return
+        # CSS обрабатывается в несколько проходов, поэтому сжимаются
+        # только окончательные имена.
+        for hashed_name in hashed_names.values():
+            if hashed_name.endswith(COMPRESSIBLE_EXTENSIONS):
+                self.write_compressed(hashed_name)
+
+    def write_compressed(self, name):
+        with self.open(name) as file:
+            content = file.read()
+        compressors = [('.gz', lambda data: gzip_bytes(data, level=9))]
+        if brotli is not None:
+            compressors.append(
+                ('.br', lambda data: brotli_bytes(data, quality=11)))
+        for suffix, compress in compressors:
+            compressed = compress(content)
+            if len(compressed) >= len(content):
+                continue
+            if self.exists(name + suffix):
+                self.delete(name + suffix)
+            self._save(name + suffix, ContentFile(compressed))
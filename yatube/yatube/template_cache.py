@@ -0,0 +1,35 @@
+import os
+
+from django.conf import settings
+from django.template import engines
+from django.template.backends.django import DjangoTemplates
+from django.template.utils import get_app_template_dirs
+
+
+def project_template_dirs(engine):
+    """Каталоги шаблонов из DIRS и из приложений самого проекта."""
+    app_dirs = [directory for directory in get_app_template_dirs('templates')
+                if directory.startswith(settings.BASE_DIR)]
+    return [*engine.dirs, *app_dirs]
+
+
+def precompile_templates():
+    """Разбирает все шаблоны проекта, наполняя кеширующий загрузчик.
+
+    Ошибки синтаксиса всплывают при старте, а не на первом запросе к
+    странице. Возвращает число загруженных шаблонов.
+    """
+    loaded = 0
+    for backend in engines.all():
+        if not isinstance(backend, DjangoTemplates):
+            continue
+        for directory in project_template_dirs(backend.engine):
+            for root, _, files in os.walk(directory):
+                for file in files:
+                    if not file.endswith(('.html', '.txt')):
+                        continue
+                    name = os.path.relpath(os.path.join(root, file),
+                                           directory)
+                    backend.engine.get_template(name.replace(os.sep, '/'))
+                    loaded += 1
+    return loaded